@@ -0,0 +1,3 @@
+from .timeseries import interpolate_at_dates
+from .metrics import compute_video_metrics
+from .tiering import compute_tiers, TIER_GOLD, TIER_SILVER, TIER_BRONZE
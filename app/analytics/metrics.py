@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+
+def compute_video_metrics(view_count: Optional[int], like_count: Optional[int], comment_count: Optional[int],
+                          published_at: Optional[datetime], as_of: Optional[datetime] = None) -> Dict[str, Optional[float]]:
+    """Derived metrics of a video, as displayed in the dashboard.
+
+    Rates are in percent and 0 when the video has no views. Ratios that cannot be
+    computed (no likes, published today) are None.
+    """
+    views = view_count or 0
+    likes = like_count or 0
+    comments = comment_count or 0
+    if as_of is None:
+        as_of = datetime.utcnow()
+    days_since_publish = (as_of - published_at).days if published_at else None
+
+    return {
+        "engagement_rate": (likes + comments) / views * 100 if views > 0 else 0.0,
+        "like_rate": likes / views * 100 if views > 0 else 0.0,
+        "comment_rate": comments / views * 100 if views > 0 else 0.0,
+        "likes_per_1000": likes / views * 1000 if views > 0 else 0.0,
+        "comments_per_1000": comments / views * 1000 if views > 0 else 0.0,
+        "comments_per_like": comments / likes if likes > 0 else None,
+        "days_since_publish": days_since_publish,
+        "views_per_day": views / days_since_publish if days_since_publish and days_since_publish > 0 else None,
+        "interactions_per_day": (likes + comments) / days_since_publish if days_since_publish and days_since_publish > 0 else None,
+    }
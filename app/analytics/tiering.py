@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from typing import Sequence
+
+TIER_GOLD = "gold"
+TIER_SILVER = "silver"
+TIER_BRONZE = "bronze"
+
+# Metrics ranked within each group; the tier score is the percentile rank of their mean rank
+TIER_METRICS = ["view_count", "views_per_day", "engagement_rate"]
+
+# Upper bounds (in days since publication) of the age cohorts
+DEFAULT_AGE_COHORTS = (7, 30, 90, 365)
+
+
+def age_cohorts(days_since_publish: pd.Series, bounds: Sequence[int] = DEFAULT_AGE_COHORTS) -> np.ndarray:
+    """Index of the age cohort of each video (0 = newest); unknown ages fall in the oldest cohort"""
+    days = days_since_publish.fillna(np.inf).to_numpy(dtype=float)
+    return np.searchsorted(np.asarray(bounds, dtype=float), days, side="left")
+
+
+def compute_tiers(videos: pd.DataFrame, gold_threshold: float, bronze_threshold: float,
+                  by_age_cohort: bool = False) -> pd.DataFrame:
+    """Classify videos into gold/silver/bronze from their percentile ranks within their channel.
+
+    `videos` needs channel_id and the TIER_METRICS columns (plus days_since_publish with
+    `by_age_cohort`, which ranks each video only against channel videos of similar age).
+    Returns a frame with the same index and `tier_score` / `tier` columns.
+    """
+    if videos.empty:
+        return pd.DataFrame({"tier_score": pd.Series(dtype=float), "tier": pd.Series(dtype=object)})
+
+    keys = [videos["channel_id"]]
+    if by_age_cohort:
+        keys.append(pd.Series(age_cohorts(videos["days_since_publish"]), index=videos.index))
+
+    ranks = videos[TIER_METRICS].groupby(keys).rank(pct=True, method="average")
+    # Re-rank the combined score so the thresholds read as "top 20%" / "bottom 20%"
+    combined = ranks.mean(axis=1, skipna=True).fillna(0.0)
+    score = combined.groupby(keys).rank(pct=True, method="average")
+    tier = np.select(
+        [score >= gold_threshold, score <= bronze_threshold],
+        [TIER_GOLD, TIER_BRONZE],
+        default=TIER_SILVER,
+    )
+    return pd.DataFrame({"tier_score": score, "tier": tier}, index=videos.index)
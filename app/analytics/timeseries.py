@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+
+def to_int64_timestamps(dates) -> np.ndarray:
+    """Convert dates (strings, datetimes or datetime64) to int64 nanosecond timestamps"""
+    return pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def interpolate_at_dates(history_dates, history_counts, query_dates) -> np.ndarray:
+    """Linearly interpolate a history series at arbitrary dates in one vectorized pass.
+
+    `history_dates` must be sorted. Dates outside the history range take the first/last
+    value, and a single-point history is constant.
+    """
+    if len(history_dates) == 0:
+        return np.zeros(len(query_dates))
+    return np.interp(
+        to_int64_timestamps(query_dates),
+        to_int64_timestamps(history_dates),
+        np.asarray(history_counts, dtype=float),
+    )
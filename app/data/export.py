@@ -0,0 +1,148 @@
+from app.data.storage import (
+    Session, Channel, Video, VideoMetrics, ChannelStatsSnapshot, VideoStatsSnapshot,
+    VIDEO_METRIC_COLUMNS, VIDEO_TIER_COLUMNS, get_meta_value, set_meta_value
+)
+from config import config
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from typing import Dict, List, Optional, Set
+import logging
+import os
+import shutil
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Last successful export (UTC ISO timestamp), stored in app_meta
+EXPORT_WATERMARK_KEY = "parquet_export_watermark"
+
+# Datasets under the export directory, Hive-partitioned (readable with pyarrow.dataset / pandas / DuckDB)
+CHANNELS_FILE = "channels.parquet"
+VIDEOS_DATASET = "videos"                # channel_id=<id>/
+CHANNEL_STATS_DATASET = "channel_stats"  # channel_id=<id>/month=<YYYY-MM>/
+VIDEO_STATS_DATASET = "video_stats"      # channel_id=<id>/month=<YYYY-MM>/
+PART_FILE = "part-0.parquet"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+
+
+def _write_parquet(df: pd.DataFrame, path: str):
+    """Write a file atomically, so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, engine="pyarrow", index=False)
+    os.replace(tmp_path, path)
+
+
+def _partition_dir(output_dir: str, dataset: str, channel_id: str, month: Optional[str] = None) -> str:
+    path = os.path.join(output_dir, dataset, f"channel_id={channel_id}")
+    return os.path.join(path, f"month={month}") if month else path
+
+
+def _read_frame(sess, query) -> pd.DataFrame:
+    return pd.read_sql(query.statement, sess.connection())
+
+
+def _changed_channel_ids(sess, since: Optional[datetime]) -> List[str]:
+    """Channels fetched since the watermark, or whose videos were (statistics-only refreshes)"""
+    query = sess.query(Channel.id)
+    if since is not None:
+        recent_videos = sess.query(Video.channel_id).filter(Video.fetched_at >= since)
+        query = query.filter(or_(Channel.fetched_at >= since, Channel.id.in_(recent_videos.scalar_subquery())))
+    return [channel_id for (channel_id,) in query.order_by(Channel.id)]
+
+
+def _export_history(sess, output_dir: str, dataset: str, query, channel_id: str) -> int:
+    """Write the monthly partitions of one channel's snapshot series (rewriting the months present in `query`)"""
+    df = _read_frame(sess, query)
+    if df.empty:
+        return 0
+    df["date"] = pd.to_datetime(df["date"])
+    months = df["date"].dt.strftime("%Y-%m")
+    for month, part in df.groupby(months, sort=True):
+        _write_parquet(part.reset_index(drop=True), os.path.join(_partition_dir(output_dir, dataset, channel_id, month), PART_FILE))
+    return len(df)
+
+
+def _remove_deleted_channels(output_dir: str, channel_ids: Set[str]):
+    for dataset in (VIDEOS_DATASET, CHANNEL_STATS_DATASET, VIDEO_STATS_DATASET):
+        dataset_dir = os.path.join(output_dir, dataset)
+        if not os.path.isdir(dataset_dir):
+            continue
+        for name in os.listdir(dataset_dir):
+            if name.startswith("channel_id=") and name[len("channel_id="):] not in channel_ids:
+                shutil.rmtree(os.path.join(dataset_dir, name))
+                logger.info(f"Removed exported {dataset} of deleted channel {name[len('channel_id='):]}")
+
+
+def export_parquet(output_dir: Optional[str] = None, full: bool = False) -> Dict[str, int]:
+    """Export channels, videos and snapshot series to partitioned Parquet files.
+
+    Incremental by default: only channels fetched since the last export are rewritten,
+    and only their history months from the last export on. `full` rewrites everything.
+    Returns the number of rows written per dataset.
+    """
+    _require_pyarrow()
+    output_dir = output_dir or config.EXPORT_DIR
+    started_at = datetime.utcnow()
+    watermark = None if full else get_meta_value(EXPORT_WATERMARK_KEY)
+    since = datetime.fromisoformat(watermark) if watermark else None
+    # Snapshots are keyed by local date: start one day early to stay on the safe side
+    since_day = (since - timedelta(days=1)).date().replace(day=1) if since else None
+
+    counts = {CHANNELS_FILE: 0, VIDEOS_DATASET: 0, CHANNEL_STATS_DATASET: 0, VIDEO_STATS_DATASET: 0}
+    sess = Session()
+    try:
+        channels = _read_frame(sess, sess.query(
+            Channel.id, Channel.title, Channel.description, Channel.subscribers,
+            Channel.video_count, Channel.view_count, Channel.fetched_at, Channel.snippet_fetched_at
+        ).order_by(Channel.id))
+        _write_parquet(channels, os.path.join(output_dir, CHANNELS_FILE))
+        counts[CHANNELS_FILE] = len(channels)
+
+        changed_channel_ids = _changed_channel_ids(sess, since)
+        for channel_id in changed_channel_ids:
+            videos = _read_frame(sess, sess.query(
+                Video.id, Video.title, Video.description, Video.published_at,
+                Video.view_count, Video.like_count, Video.comment_count, Video.hidden, Video.fetched_at,
+                *[getattr(VideoMetrics, name) for name in VIDEO_METRIC_COLUMNS + VIDEO_TIER_COLUMNS]
+            ).outerjoin(VideoMetrics, VideoMetrics.video_id == Video.id).filter(
+                Video.channel_id == channel_id
+            ).order_by(Video.published_at, Video.id))
+            _write_parquet(videos, os.path.join(_partition_dir(output_dir, VIDEOS_DATASET, channel_id), PART_FILE))
+            counts[VIDEOS_DATASET] += len(videos)
+
+            channel_stats = sess.query(
+                ChannelStatsSnapshot.date, ChannelStatsSnapshot.subscribers, ChannelStatsSnapshot.views
+            ).filter(ChannelStatsSnapshot.channel_id == channel_id)
+            video_stats = sess.query(
+                VideoStatsSnapshot.video_id, VideoStatsSnapshot.date, VideoStatsSnapshot.views,
+                VideoStatsSnapshot.likes, VideoStatsSnapshot.comments
+            ).join(Video, Video.id == VideoStatsSnapshot.video_id).filter(Video.channel_id == channel_id)
+            if since_day is not None:
+                channel_stats = channel_stats.filter(ChannelStatsSnapshot.date >= since_day)
+                video_stats = video_stats.filter(VideoStatsSnapshot.date >= since_day)
+            counts[CHANNEL_STATS_DATASET] += _export_history(
+                sess, output_dir, CHANNEL_STATS_DATASET,
+                channel_stats.order_by(ChannelStatsSnapshot.date), channel_id
+            )
+            counts[VIDEO_STATS_DATASET] += _export_history(
+                sess, output_dir, VIDEO_STATS_DATASET,
+                video_stats.order_by(VideoStatsSnapshot.date, VideoStatsSnapshot.video_id), channel_id
+            )
+
+        _remove_deleted_channels(output_dir, set(channels["id"]))
+    finally:
+        sess.close()
+
+    set_meta_value(EXPORT_WATERMARK_KEY, started_at.isoformat())
+    logger.info(
+        f"Exported {len(changed_channel_ids)} channels to {output_dir} ({'full' if since is None else 'incremental'}): "
+        + ", ".join(f"{name} {count} rows" for name, count in counts.items())
+    )
+    return counts
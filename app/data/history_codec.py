@@ -0,0 +1,110 @@
+import json
+import struct
+import zlib
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+
+# Compact history blob:
+#   magic | point count (uint32) | first day (int32, days since 1970-01-01) | first count (int64)
+#   | last day (int32) | last count (int64) | appended point count (uint16)
+#   | zlib(day deltas as int32 + count deltas as int64, little-endian)
+#   | appended points as uncompressed (day delta int32, count delta int64) records
+# Daily series have day deltas of 1 and small count deltas, which zlib squeezes to a few bytes per point.
+# Daily appends go after the zlib stream, so adding a point neither decodes nor recompresses the series;
+# past MAX_APPENDED of them the blob is encoded again.
+HISTORY_MAGIC = b"YH2"
+LEGACY_HISTORY_MAGIC = b"YH1"  # first written format: no last point, no appended points
+_HEADER = struct.Struct("<3sIiqiqH")
+_LEGACY_HEADER = struct.Struct("<3sIiq")
+_RECORD = struct.Struct("<iq")
+_RECORD_DTYPE = np.dtype([("day", "<i4"), ("count", "<i8")])
+MAX_APPENDED = 64
+
+HistoryArrays = Tuple[np.ndarray, np.ndarray]
+
+
+def is_encoded_history(value) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:3]) in (HISTORY_MAGIC, LEGACY_HISTORY_MAGIC)
+
+
+def encode_history(dates, counts) -> bytes:
+    """Encode a history series (dates sortable as datetime64[D], integer counts) to a compact blob"""
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    if np.any(days[1:] < days[:-1]):
+        order = np.argsort(days, kind="stable")
+        days, counts = days[order], counts[order]
+    if len(days) == 0:
+        return _HEADER.pack(HISTORY_MAGIC, 0, 0, 0, 0, 0, 0) + zlib.compress(b"")
+    body = np.diff(days).astype("<i4").tobytes() + np.diff(counts).astype("<i8").tobytes()
+    header = _HEADER.pack(HISTORY_MAGIC, len(days), int(days[0]), int(counts[0]), int(days[-1]), int(counts[-1]), 0)
+    return header + zlib.compress(body)
+
+
+def decode_history(blob: bytes) -> HistoryArrays:
+    """Decode a blob to (dates as datetime64[D], counts as int64) arrays, sorted by date"""
+    blob = bytes(blob)
+    if blob[:3] == LEGACY_HISTORY_MAGIC:
+        _, size, first_day, first_count = _LEGACY_HEADER.unpack_from(blob)
+        data = blob[_LEGACY_HEADER.size:]
+    else:
+        magic, size, first_day, first_count, _, _, _ = _HEADER.unpack_from(blob)
+        if magic != HISTORY_MAGIC:
+            raise ValueError("Not an encoded history")
+        data = blob[_HEADER.size:]
+    if size == 0:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)
+    stream = zlib.decompressobj()
+    body = stream.decompress(data)
+    appended = np.frombuffer(stream.unused_data, dtype=_RECORD_DTYPE)
+    compressed = len(body) // (_RECORD.size)
+    day_deltas = np.concatenate([np.frombuffer(body, dtype="<i4", count=compressed), appended["day"]])
+    count_deltas = np.concatenate([np.frombuffer(body, dtype="<i8", offset=4 * compressed), appended["count"]])
+    days = np.empty(size, dtype=np.int64)
+    days[0] = first_day
+    np.cumsum(day_deltas, out=days[1:])
+    days[1:] += first_day
+    counts = np.empty(size, dtype=np.int64)
+    counts[0] = first_count
+    np.cumsum(count_deltas, out=counts[1:])
+    counts[1:] += first_count
+    return days.astype("datetime64[D]"), counts
+
+
+def append_history(blob: bytes, date, count: int) -> Optional[bytes]:
+    """Append a point after the last one of a blob, without decoding or recompressing the series.
+
+    Returns None when that is not possible: the date is not after the last point, the blob
+    is in the legacy format or already carries MAX_APPENDED appended points. The caller then
+    goes through the decoded arrays and encode_history.
+    """
+    blob = bytes(blob)
+    if blob[:3] != HISTORY_MAGIC:
+        return None
+    _, size, first_day, first_count, last_day, last_count, appended = _HEADER.unpack_from(blob)
+    day = int(np.datetime64(date, "D").astype(np.int64))
+    if size == 0:
+        return encode_history([date], [count])
+    if day <= last_day or appended >= MAX_APPENDED:
+        return None
+    header = _HEADER.pack(HISTORY_MAGIC, size + 1, first_day, first_count, day, int(count), appended + 1)
+    return header + blob[_HEADER.size:] + _RECORD.pack(day - last_day, int(count) - last_count)
+
+
+def history_to_arrays(value: Union[str, bytes, List[Dict], None]) -> HistoryArrays:
+    """Read a history in any stored form (blob, legacy JSON text, list of points) as arrays"""
+    if is_encoded_history(value):
+        return decode_history(value)
+    points = json.loads(value) if isinstance(value, str) and value else (value or [])
+    dates = np.array([point["date"] for point in points], dtype="datetime64[D]")
+    counts = np.array([point["count"] for point in points], dtype=np.int64)
+    order = np.argsort(dates, kind="stable")
+    return dates[order], counts[order]
+
+
+def arrays_to_points(dates: np.ndarray, counts: np.ndarray) -> List[Dict]:
+    """Convert arrays back to the [{"date": "2025-01-01", "count": 1000}, ...] form"""
+    return [
+        {"date": day, "count": count}
+        for day, count in zip(np.datetime_as_string(dates, unit="D").tolist(), counts.tolist())
+    ]
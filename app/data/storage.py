@@ -1,62 +1,271 @@
 from sqlalchemy import (
-    create_engine, Column, Boolean, String, Integer, BigInteger, DateTime, Text, ForeignKey
+    create_engine, event, bindparam, cast, func, inspect, or_, text, update, Column, Float, Index, Boolean, String, Integer, BigInteger, Date, DateTime, LargeBinary, Text, ForeignKey
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime
-from typing import List, Dict, Optional
+from sqlalchemy.orm import deferred, sessionmaker, relationship, undefer
+from sqlalchemy.pool import QueuePool
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Dict, Optional, Set, Tuple, Union
+from app.analytics.metrics import compute_video_metrics
+from app.analytics.tiering import compute_tiers
+from app.data.history_codec import (
+    HistoryArrays, append_history, arrays_to_points, decode_history, encode_history, history_to_arrays, is_encoded_history
+)
+from config import config
 import json
 import logging
+import os
+import numpy as np
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
-engine = create_engine("sqlite:///data/youtube.db", echo=False)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection: WAL lets dashboard reads run during ingestion writes"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, fsync only at checkpoints
+        cursor.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")  # Negative = KiB
+        cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+def create_db_engine(database_path: Optional[str] = None):
+    """Create the SQLite engine shared by the ingestion scripts and the dashboard"""
+    database_path = database_path or config.DATABASE_PATH
+    directory = os.path.dirname(database_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db_engine = create_engine(
+        f"sqlite:///{database_path}",
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        # Connections move between the API worker threads and the writer
+        connect_args={"check_same_thread": False, "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000},
+    )
+    event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+engine = create_db_engine()
 Session = sessionmaker(bind=engine)
 
+def configure_database(database_path: str):
+    """Point every storage helper at another database file"""
+    global engine
+    engine.dispose()
+    engine = create_db_engine(database_path)
+    Session.configure(bind=engine)
+    return engine
+
+# Keep IN (...) lists below SQLite's bound parameter limit (999 on older builds)
+SQLITE_IN_BATCH_SIZE = 500
+
+# Heavy text columns are deferred: loading a Channel/Video object only reads them when accessed.
+# List queries select the columns they need; single-row readers undefer what they show.
+
 class Channel(Base):
     __tablename__ = "channels"
     id = Column(String, primary_key=True)
     title = Column(String)
-    description = Column(Text)
+    description = deferred(Column(Text))
     subscribers = Column(BigInteger)
     video_count = Column(Integer)
     view_count = Column(BigInteger)
     fetched_at = Column(DateTime, default=datetime.utcnow)
+    snippet_fetched_at = Column(DateTime, nullable=True)  # Last time title/description were refreshed
+    uploads_walk_complete = Column(Boolean, nullable=True)  # Last uploads walk finished: older pages are all stored
     videos = relationship("Video", back_populates="channel")
     
-    # New history fields
-    subscriber_history = Column(Text, nullable=True)  # JSON: [{"date": "2025-01-01", "count": 1000}, ...]
-    view_count_history = Column(Text, nullable=True)  # JSON: [{"date": "2025-01-01", "count": 50000}, ...]
+    # Legacy history fields, superseded by channel_stats_snapshots (kept for migration)
+    subscriber_history = deferred(Column(LargeBinary, nullable=True), group="legacy_history")  # Compact blob (history_codec), JSON on old databases
+    view_count_history = deferred(Column(LargeBinary, nullable=True), group="legacy_history")  # Compact blob (history_codec), JSON on old databases
 
 class Video(Base):
     __tablename__ = "videos"
     id = Column(String, primary_key=True)
     channel_id = Column(String, ForeignKey("channels.id"))
     title = Column(String)
-    description = Column(Text)
+    description = deferred(Column(Text))
     published_at = Column(DateTime)
     view_count = Column(BigInteger)
     like_count = Column(BigInteger)
     comment_count = Column(BigInteger)
     fetched_at = Column(DateTime, default=datetime.utcnow)
+    snippet_fetched_at = Column(DateTime, nullable=True)  # Last time title/description were refreshed
     channel = relationship("Channel", back_populates="videos")
     hidden = Column(Boolean, nullable=False, default=False)
-    analysis = Column(Text, nullable=True)
+    analysis = deferred(Column(Text, nullable=True))
     
-    # New history fields
-    view_count_history = Column(Text, nullable=True)    # JSON: [{"date": "2025-01-01", "count": 1000}, ...]
-    like_count_history = Column(Text, nullable=True)    # JSON: [{"date": "2025-01-01", "count": 50}, ...]
-    comment_count_history = Column(Text, nullable=True) # JSON: [{"date": "2025-01-01", "count": 10}, ...]
+    # Legacy history fields, superseded by video_stats_snapshots (kept for migration)
+    view_count_history = deferred(Column(LargeBinary, nullable=True), group="legacy_history")    # Compact blob (history_codec), JSON on old databases
+    like_count_history = deferred(Column(LargeBinary, nullable=True), group="legacy_history")    # Compact blob (history_codec), JSON on old databases
+    comment_count_history = deferred(Column(LargeBinary, nullable=True), group="legacy_history") # Compact blob (history_codec), JSON on old databases
+
+    __table_args__ = (
+        # Per-channel listings: WHERE channel_id = ? AND hidden = ? ORDER BY published_at
+        Index("ix_videos_channel_hidden_published", "channel_id", "hidden", "published_at"),
+    )
+
+class ChannelStatsSnapshot(Base):
+    """One row per channel per day, append-only time series"""
+    __tablename__ = "channel_stats_snapshots"
+    channel_id = Column(String, ForeignKey("channels.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    subscribers = Column(BigInteger)
+    views = Column(BigInteger)
+
+class VideoStatsSnapshot(Base):
+    """One row per video per day, append-only time series"""
+    __tablename__ = "video_stats_snapshots"
+    video_id = Column(String, ForeignKey("videos.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    views = Column(BigInteger)
+    likes = Column(BigInteger)
+    comments = Column(BigInteger)
+
+class VideoMetrics(Base):
+    """Derived metrics of a video, recomputed at ingest time when its statistics change or are from an earlier day"""
+    __tablename__ = "video_metrics"
+    video_id = Column(String, ForeignKey("videos.id"), primary_key=True)
+    engagement_rate = Column(Float, index=True)  # (likes + comments) / views, in %
+    like_rate = Column(Float, index=True)        # likes / views, in %
+    comment_rate = Column(Float)                 # comments / views, in %
+    likes_per_1000 = Column(Float)
+    comments_per_1000 = Column(Float)
+    comments_per_like = Column(Float, nullable=True)
+    days_since_publish = Column(Integer)         # As of computed_at
+    views_per_day = Column(Float, nullable=True, index=True)
+    interactions_per_day = Column(Float, nullable=True)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    tier = Column(String, nullable=True, index=True)  # gold / silver / bronze within the channel
+    tier_score = Column(Float, nullable=True)          # Percentile of the combined rank, 0-1
+
+VIDEO_METRIC_COLUMNS = [
+    "engagement_rate", "like_rate", "comment_rate", "likes_per_1000", "comments_per_1000",
+    "comments_per_like", "days_since_publish", "views_per_day", "interactions_per_day",
+]
+# Written by update_channel_tiers, not by the metrics upsert
+VIDEO_TIER_COLUMNS = ["tier", "tier_score"]
+
+class ChannelIdentifier(Base):
+    """Cache of channels.txt identifiers (@handle, username, name) resolved to channel IDs"""
+    __tablename__ = "channel_identifiers"
+    identifier = Column(String, primary_key=True)
+    channel_id = Column(String, nullable=False)
+    resolved_at = Column(DateTime, default=datetime.utcnow)
+
+class QuotaUsage(Base):
+    """API quota units spent per quota day (midnight Pacific Time)"""
+    __tablename__ = "quota_usage"
+    day = Column(Date, primary_key=True)
+    units_used = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ApiResponseCache(Base):
+    """Last API response per request with its ETag, used for conditional requests"""
+    __tablename__ = "api_response_cache"
+    request_key = Column(String, primary_key=True)
+    etag = Column(String, nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON
+    fetched_at = Column(DateTime, default=datetime.utcnow)  # Last fetched or served after a 304
+
+class AppMeta(Base):
+    """Key/value store for schema and maintenance flags"""
+    __tablename__ = "app_meta"
+    key = Column(String, primary_key=True)
+    value = Column(String)
+
+RUN_RUNNING = "running"
+RUN_COMPLETED = "completed"
+RUN_INCOMPLETE = "incomplete"  # Finished with failed or skipped channels
+
+CHANNEL_PENDING = "pending"
+CHANNEL_DONE = "done"
+CHANNEL_FAILED = "failed"
+
+class UpdateRun(Base):
+    """One execution of the channel update (run ledger)"""
+    __tablename__ = "update_runs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    status = Column(String, nullable=False, default=RUN_RUNNING)
+    resumed_count = Column(Integer, nullable=False, default=0)  # How many times --resume picked it up
+
+class UpdateRunChannel(Base):
+    """Status of one channels.txt identifier within an update run"""
+    __tablename__ = "update_run_channels"
+    run_id = Column(Integer, ForeignKey("update_runs.id"), primary_key=True)
+    identifier = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False)  # Processing order within the run
+    status = Column(String, nullable=False, default=CHANNEL_PENDING, index=True)
+    channel_id = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+    error_class = Column(String, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+HISTORY_MIGRATION_KEY = "history_snapshots_migrated"
+DATA_VERSION_KEY = "data_version"
 
 def init_db():
     Base.metadata.create_all(engine)
+    add_missing_columns()
+    add_missing_indexes()
+    migrate_history_to_snapshots()
+    backfill_video_metrics()
+
+def add_missing_columns():
+    """Lightweight migration: add model columns that an existing database does not have yet"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                logger.info(f"Added missing column {table.name}.{column.name}")
+
+def add_missing_indexes():
+    """Lightweight migration: create model indexes that an existing database does not have yet"""
+    inspector = inspect(engine)
+    created = False
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                index.create(conn)
+                created = True
+                logger.info(f"Added missing index {index.name} on {table.name}")
+        if created:
+            # Refresh the planner statistics so the new indexes get picked
+            conn.execute(text("ANALYZE"))
 
 # Helper functions for history management
-def parse_history_json(history_str: Optional[str]) -> List[Dict]:
-    """Parse history JSON string to list of dicts, return empty list if None or invalid"""
+def parse_history_json(history_str: Union[str, bytes, None]) -> List[Dict]:
+    """Parse a stored history (JSON string or compact blob) to a list of dicts, empty list if None or invalid"""
     if not history_str:
         return []
+    if is_encoded_history(history_str):
+        return arrays_to_points(*decode_history(history_str))
     try:
         return json.loads(history_str)
     except (json.JSONDecodeError, TypeError) as e:
@@ -67,74 +276,333 @@ def serialize_history_json(history_list: List[Dict]) -> str:
     """Serialize history list to JSON string"""
     return json.dumps(history_list)
 
-def add_history_point(current_history_str: Optional[str], new_count: int, date_str: Optional[str] = None) -> str:
-    """Add a new data point to history JSON"""
+def serialize_history(history_list: List[Dict]) -> bytes:
+    """Serialize a history list to a compact blob (see history_codec), the format written to the database"""
+    points = [point for point in history_list if point.get("date") and point.get("count") is not None]
+    return encode_history([point["date"] for point in points], [point["count"] for point in points])
+
+def _history_arrays(history_str: Union[str, bytes, None]) -> HistoryArrays:
+    if is_encoded_history(history_str):
+        return decode_history(history_str)
+    points = [point for point in parse_history_json(history_str) if point.get("date") and point.get("count") is not None]
+    return history_to_arrays(points)
+
+def add_history_point(current_history_str: Union[str, bytes, None], new_count: int, date_str: Optional[str] = None) -> bytes:
+    """Add or update the point of a date in a stored history, keeping it sorted by date.
+
+    Daily ingestion appends after the last point of a blob without decoding it; older
+    dates are placed by binary search on the decoded dates. Always returns a compact
+    blob, legacy JSON input included.
+    """
     if date_str is None:
         date_str = datetime.now().strftime("%Y-%m-%d")
-    
-    history = parse_history_json(current_history_str)
-    
-    # Check if we already have data for this date
-    for point in history:
-        if point.get("date") == date_str:
-            # Update existing point
-            point["count"] = new_count
-            return serialize_history_json(history)
-    
-    # Add new point
-    history.append({"date": date_str, "count": new_count})
-    
-    # Keep history sorted by date
-    history.sort(key=lambda x: x["date"])
-    
-    return serialize_history_json(history)
 
-def get_history_for_date_range(history_str: Optional[str], start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
-    """Get history points within a date range"""
+    if is_encoded_history(current_history_str):
+        appended = append_history(current_history_str, date_str, new_count)
+        if appended is not None:
+            return appended
+
+    dates, counts = _history_arrays(current_history_str)
+    day = np.datetime64(date_str, "D")
+    if len(dates) == 0 or dates[-1] < day:
+        return encode_history(np.append(dates, day), np.append(counts, new_count))
+    index = np.searchsorted(dates, day)
+    if dates[index] == day:
+        counts[index] = new_count
+    else:
+        dates, counts = np.insert(dates, index, day), np.insert(counts, index, new_count)
+    return encode_history(dates, counts)
+
+def get_history_for_date_range(history_str: Union[str, bytes, None], start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """Get history points within a date range (inclusive), sliced by binary search on the sorted dates"""
+    if is_encoded_history(history_str):
+        dates, counts = decode_history(history_str)
+        lo = np.searchsorted(dates, np.datetime64(start_date, "D"), side="left") if start_date else 0
+        hi = np.searchsorted(dates, np.datetime64(end_date, "D"), side="right") if end_date else len(dates)
+        return arrays_to_points(dates[lo:hi], counts[lo:hi])
+
     history = parse_history_json(history_str)
     
     if not start_date and not end_date:
         return history
     
-    filtered = []
-    for point in history:
-        point_date = point.get("date")
-        if not point_date:
-            continue
-            
-        if start_date and point_date < start_date:
-            continue
-        if end_date and point_date > end_date:
-            continue
-            
-        filtered.append(point)
-    
-    return filtered
+    dates = [point["date"] for point in history]
+    lo = bisect_left(dates, start_date) if start_date else 0
+    hi = bisect_right(dates, end_date) if end_date else len(history)
+    return history[lo:hi]
 
-def get_latest_history_point(history_str: Optional[str]) -> Optional[Dict]:
-    """Get the most recent history point"""
+def get_latest_history_point(history_str: Union[str, bytes, None]) -> Optional[Dict]:
+    """Get the most recent history point (the last one, as histories are kept sorted)"""
+    if is_encoded_history(history_str):
+        dates, counts = decode_history(history_str)
+        return arrays_to_points(dates[-1:], counts[-1:])[0] if len(dates) else None
     history = parse_history_json(history_str)
-    if not history:
-        return None
-    
-    # History should be sorted, but just in case
-    return max(history, key=lambda x: x.get("date", ""))
+    return history[-1] if history else None
 
-def initialize_history_if_empty(current_value: int, current_history_str: Optional[str]) -> str:
+def initialize_history_if_empty(current_value: int, current_history_str: Union[str, bytes, None]) -> Union[str, bytes]:
     """Initialize history with current value if history is empty"""
     if current_history_str and parse_history_json(current_history_str):
         return current_history_str  # Already has history
     
     # Create initial history point with today's date
     today = datetime.now().strftime("%Y-%m-%d")
-    return serialize_history_json([{"date": today, "count": current_value}])
+    return serialize_history([{"date": today, "count": current_value}])
+
+def _bump_data_version(sess):
+    """Increment the data version stamp (in the caller's transaction) so readers drop cached data"""
+    stmt = sqlite_insert(AppMeta).values(key=DATA_VERSION_KEY, value="1")
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AppMeta.key],
+        set_={"value": cast(cast(AppMeta.value, Integer) + 1, String)},
+    )
+    sess.execute(stmt)
+
+def get_data_version() -> int:
+    """Get the data version stamp, bumped by every write to channels and videos"""
+    sess = Session()
+    try:
+        entry = sess.query(AppMeta).get(DATA_VERSION_KEY)
+        return int(entry.value) if entry else 0
+    finally:
+        sess.close()
+
+def get_meta_value(key: str) -> Optional[str]:
+    """Read a value from the app_meta key/value store"""
+    sess = Session()
+    try:
+        entry = sess.query(AppMeta).get(key)
+        return entry.value if entry else None
+    finally:
+        sess.close()
+
+def set_meta_value(key: str, value: str):
+    """Write a value to the app_meta key/value store"""
+    sess = Session()
+    try:
+        stmt = sqlite_insert(AppMeta).values(key=key, value=value)
+        stmt = stmt.on_conflict_do_update(index_elements=[AppMeta.key], set_={"value": stmt.excluded.value})
+        sess.execute(stmt)
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error saving {key}: {e}")
+        raise
+    finally:
+        sess.close()
+
+# Time-series snapshot helpers
+def _upsert_channel_snapshots(sess, rows: List[Dict]):
+    """Insert channel snapshot rows, overwriting any point already stored for the same day"""
+    if not rows:
+        return
+    stmt = sqlite_insert(ChannelStatsSnapshot)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChannelStatsSnapshot.channel_id, ChannelStatsSnapshot.date],
+        set_={"subscribers": stmt.excluded.subscribers, "views": stmt.excluded.views},
+    )
+    sess.execute(stmt, rows)
+
+def _upsert_video_snapshots(sess, rows: List[Dict]):
+    """Insert video snapshot rows, overwriting any point already stored for the same day"""
+    if not rows:
+        return
+    stmt = sqlite_insert(VideoStatsSnapshot)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoStatsSnapshot.video_id, VideoStatsSnapshot.date],
+        set_={
+            "views": stmt.excluded.views,
+            "likes": stmt.excluded.likes,
+            "comments": stmt.excluded.comments,
+        },
+    )
+    sess.execute(stmt, rows)
+
+def _video_metrics_row(video_id: str, view_count, like_count, comment_count, published_at, computed_at: datetime) -> Dict:
+    row = compute_video_metrics(view_count, like_count, comment_count, published_at, as_of=computed_at)
+    row["video_id"] = video_id
+    row["computed_at"] = computed_at
+    return row
+
+def _upsert_video_metrics(sess, rows: List[Dict]):
+    """Insert or replace the derived metrics of videos"""
+    if not rows:
+        return
+    stmt = sqlite_insert(VideoMetrics)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoMetrics.video_id],
+        set_={name: stmt.excluded[name] for name in VIDEO_METRIC_COLUMNS + ["computed_at"]},
+    )
+    sess.execute(stmt, rows)
+
+def backfill_video_metrics(batch_size: int = 1000):
+    """Compute metrics for stored videos that have none yet (existing databases, interrupted writes)"""
+    sess = Session()
+    try:
+        computed_at = datetime.utcnow()
+        missing = sess.query(
+            Video.id, Video.view_count, Video.like_count, Video.comment_count, Video.published_at
+        ).outerjoin(VideoMetrics, VideoMetrics.video_id == Video.id).filter(VideoMetrics.video_id == None).all()
+        for i in range(0, len(missing), batch_size):
+            _upsert_video_metrics(sess, [_video_metrics_row(*row, computed_at) for row in missing[i:i + batch_size]])
+        sess.commit()
+        if missing:
+            logger.info(f"Computed metrics for {len(missing)} videos")
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error computing video metrics: {e}")
+        raise
+    finally:
+        sess.close()
+
+def _merge_history_columns(**histories: Optional[str]) -> Dict[date, Dict]:
+    """Merge several legacy JSON histories into {date: {metric: count}}"""
+    merged = {}
+    for metric, history_str in histories.items():
+        for point in parse_history_json(history_str):
+            try:
+                point_date = date.fromisoformat(point["date"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            merged.setdefault(point_date, {})[metric] = point.get("count")
+    return merged
+
+def migrate_history_to_snapshots(batch_size: int = 500):
+    """One-shot copy of the legacy JSON history columns into the snapshot tables.
+
+    Points already present in the snapshot tables are kept as-is. The migration is
+    recorded in app_meta so it only ever runs once per database.
+    """
+    sess = Session()
+    try:
+        if sess.query(AppMeta).get(HISTORY_MIGRATION_KEY):
+            return
+
+        channel_rows = []
+        channels = sess.query(
+            Channel.id, Channel.subscriber_history, Channel.view_count_history
+        ).filter(
+            (Channel.subscriber_history != None) | (Channel.view_count_history != None)
+        )
+        for channel_id, subscriber_history, view_history in channels:
+            merged = _merge_history_columns(subscribers=subscriber_history, views=view_history)
+            for point_date, counts in merged.items():
+                channel_rows.append({
+                    "channel_id": channel_id,
+                    "date": point_date,
+                    "subscribers": counts.get("subscribers"),
+                    "views": counts.get("views"),
+                })
+        if channel_rows:
+            sess.execute(sqlite_insert(ChannelStatsSnapshot).on_conflict_do_nothing(), channel_rows)
+
+        video_rows = []
+        migrated_videos = 0
+        videos = sess.query(
+            Video.id, Video.view_count_history, Video.like_count_history, Video.comment_count_history
+        ).filter(
+            (Video.view_count_history != None)
+            | (Video.like_count_history != None)
+            | (Video.comment_count_history != None)
+        ).yield_per(batch_size)
+        for video_id, view_history, like_history, comment_history in videos:
+            merged = _merge_history_columns(views=view_history, likes=like_history, comments=comment_history)
+            for point_date, counts in merged.items():
+                video_rows.append({
+                    "video_id": video_id,
+                    "date": point_date,
+                    "views": counts.get("views"),
+                    "likes": counts.get("likes"),
+                    "comments": counts.get("comments"),
+                })
+            migrated_videos += 1
+            if len(video_rows) >= batch_size:
+                sess.execute(sqlite_insert(VideoStatsSnapshot).on_conflict_do_nothing(), video_rows)
+                video_rows = []
+        if video_rows:
+            sess.execute(sqlite_insert(VideoStatsSnapshot).on_conflict_do_nothing(), video_rows)
+
+        sess.add(AppMeta(key=HISTORY_MIGRATION_KEY, value=datetime.utcnow().isoformat()))
+        sess.commit()
+        logger.info(f"Migrated JSON history of {len(channel_rows)} channel points and {migrated_videos} videos to snapshot tables")
+
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error migrating history to snapshots: {e}")
+        raise
+    finally:
+        sess.close()
+
+def _compact_history_rows(sess, model, columns, batch_size: int) -> int:
+    """Rewrite the JSON values of `columns` as compact blobs, `batch_size` rows at a time"""
+    legacy = [getattr(model, name) for name in columns]
+    row_ids = [row_id for (row_id,) in sess.query(model.id).filter(or_(*[column != None for column in legacy]))]
+    stmt = update(model.__table__).where(model.__table__.c.id == bindparam("row_id")).values(
+        {name: bindparam(name) for name in columns}
+    )
+    compacted = 0
+    for i in range(0, len(row_ids), batch_size):
+        rows = []
+        for row_id, *values in sess.query(model.id, *legacy).filter(model.id.in_(row_ids[i:i + batch_size])):
+            if all(value is None or is_encoded_history(value) for value in values):
+                continue
+            rows.append({"row_id": row_id, **{
+                name: value if value is None or is_encoded_history(value) else serialize_history(parse_history_json(value))
+                for name, value in zip(columns, values)
+            }})
+        if rows:
+            sess.execute(stmt, rows)
+        compacted += len(rows)
+    return compacted
+
+def compact_legacy_history(batch_size: int = 500) -> int:
+    """Rewrite the legacy JSON history columns as compact blobs (see history_codec).
+
+    Maintenance step run by `python main.py --compact-history`, not at startup. Rows that
+    already hold blobs are left alone, so it can be run again. Returns the rewritten row count.
+    """
+    sess = Session()
+    try:
+        compacted = _compact_history_rows(sess, Channel, ["subscriber_history", "view_count_history"], batch_size)
+        compacted += _compact_history_rows(
+            sess, Video, ["view_count_history", "like_count_history", "comment_count_history"], batch_size
+        )
+        sess.commit()
+        return compacted
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error compacting legacy history: {e}")
+        raise
+    finally:
+        sess.close()
+
+def vacuum_database():
+    """VACUUM the database so pages freed by deletes and compaction are given back to the file system.
+
+    Needs exclusive access: nothing else may be writing to the database meanwhile.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+
+def _assign_if_changed(obj, **values):
+    """Set attributes only when the value differs, so unchanged text columns are not rewritten"""
+    for name, value in values.items():
+        if getattr(obj, name) != value:
+            setattr(obj, name, value)
 
-def save_channel_info(data: dict):
+def save_channel_info(data: dict, cache_entries: Optional[Dict[str, Tuple[str, bytes]]] = None):
+    """Update a channel and today's snapshot, plus the ETag `cache_entries` of the response, in one transaction"""
     sess = Session()
     try:
-        ch = sess.query(Channel).get(data["id"]) or Channel(id=data["id"])
-        ch.title = data["snippet"]["title"]
-        ch.description = data["snippet"].get("description", "")
+        # The description is compared before being rewritten
+        ch = sess.query(Channel).options(undefer(Channel.description)).get(data["id"]) or Channel(id=data["id"])
+        # Statistics-only responses carry no snippet: keep the stored text
+        if "snippet" in data:
+            _assign_if_changed(
+                ch,
+                title=data["snippet"]["title"],
+                description=data["snippet"].get("description", ""),
+            )
+            ch.snippet_fetched_at = datetime.utcnow()
         stats = data["statistics"]
         
         # Update current values
@@ -147,11 +615,19 @@ def save_channel_info(data: dict):
         ch.view_count = new_view_count
         ch.fetched_at = datetime.utcnow()
         
+        sess.add(ch)
+        sess.flush()
+        
         # Update history
-        ch.subscriber_history = add_history_point(ch.subscriber_history, new_subscribers)
-        ch.view_count_history = add_history_point(ch.view_count_history, new_view_count)
+        _upsert_channel_snapshots(sess, [{
+            "channel_id": ch.id,
+            "date": date.today(),
+            "subscribers": new_subscribers,
+            "views": new_view_count,
+        }])
+        _upsert_cached_responses(sess, cache_entries)
         
-        sess.add(ch)
+        _bump_data_version(sess)
         sess.commit()
         logger.info(f"Channel {ch.title} updated with history")
         
@@ -162,15 +638,57 @@ def save_channel_info(data: dict):
     finally:
         sess.close()
 
-def save_videos(channel_id: str, videos: List[dict]):
+def _prefetch_videos(sess, video_ids: List[str]) -> Dict[str, Video]:
+    """Load existing videos for a batch of IDs with a few IN queries instead of one get() per video"""
+    existing = {}
+    for i in range(0, len(video_ids), SQLITE_IN_BATCH_SIZE):
+        batch_ids = video_ids[i:i + SQLITE_IN_BATCH_SIZE]
+        # The description is compared before being rewritten; analysis and histories stay unloaded
+        for vid in sess.query(Video).options(undefer(Video.description)).filter(Video.id.in_(batch_ids)):
+            existing[vid.id] = vid
+    return existing
+
+def _prefetch_metrics_computed_at(sess, video_ids: List[str]) -> Dict[str, datetime]:
+    """Load when the metrics of stored videos were last computed, by ID"""
+    computed = {}
+    for i in range(0, len(video_ids), SQLITE_IN_BATCH_SIZE):
+        rows = sess.query(VideoMetrics.video_id, VideoMetrics.computed_at).filter(
+            VideoMetrics.video_id.in_(video_ids[i:i + SQLITE_IN_BATCH_SIZE])
+        )
+        computed.update(rows)
+    return computed
+
+def _metrics_stale(computed_at: Optional[datetime], now: datetime) -> bool:
+    """Per-day rates (views_per_day, days_since_publish...) age even when counters do not change"""
+    return computed_at is None or computed_at.date() < now.date()
+
+def save_videos(channel_id: str, videos: List[dict], cache_entries: Optional[Dict[str, Tuple[str, bytes]]] = None) -> int:
+    """Create or update videos with today's snapshot, plus the ETag `cache_entries` of their responses.
+
+    Returns how many had their metrics recomputed: statistics changed, or metrics computed before today.
+    """
     sess = Session()
     try:
+        existing = _prefetch_videos(sess, [v["id"] for v in videos])
+        metrics_computed_at = _prefetch_metrics_computed_at(sess, list(existing))
+        today = date.today()
+        computed_at = datetime.utcnow()
+        snapshots = []
+        metrics = []
         for v in videos:
-            vid = sess.query(Video).get(v["id"]) or Video(id=v["id"])
+            vid = existing.get(v["id"])
+            if vid is None:
+                vid = Video(id=v["id"])
+                existing[v["id"]] = vid
             vid.channel_id = channel_id
-            vid.title = v["snippet"]["title"]
-            vid.description = v["snippet"].get("description", "")
-            vid.published_at = datetime.fromisoformat(v["snippet"]["publishedAt"].replace("Z", "+00:00"))
+            _assign_if_changed(
+                vid,
+                title=v["snippet"]["title"],
+                description=v["snippet"].get("description", ""),
+                # Stored as naive UTC
+                published_at=datetime.fromisoformat(v["snippet"]["publishedAt"].replace("Z", "+00:00")).replace(tzinfo=None),
+            )
+            vid.snippet_fetched_at = datetime.utcnow()
             
             stats = v["statistics"]
             
@@ -179,20 +697,36 @@ def save_videos(channel_id: str, videos: List[dict]):
             new_like_count = int(stats.get("likeCount", 0))
             new_comment_count = int(stats.get("commentCount", 0))
             
+            stats_changed = (vid.view_count, vid.like_count, vid.comment_count) != (new_view_count, new_like_count, new_comment_count)
             vid.view_count = new_view_count
             vid.like_count = new_like_count
             vid.comment_count = new_comment_count
             vid.fetched_at = datetime.utcnow()
             
+            if stats_changed or _metrics_stale(metrics_computed_at.get(vid.id), computed_at):
+                metrics.append(_video_metrics_row(
+                    vid.id, new_view_count, new_like_count, new_comment_count, vid.published_at, computed_at
+                ))
+            
             # Update history
-            vid.view_count_history = add_history_point(vid.view_count_history, new_view_count)
-            vid.like_count_history = add_history_point(vid.like_count_history, new_like_count)
-            vid.comment_count_history = add_history_point(vid.comment_count_history, new_comment_count)
+            snapshots.append({
+                "video_id": vid.id,
+                "date": today,
+                "views": new_view_count,
+                "likes": new_like_count,
+                "comments": new_comment_count,
+            })
             
             sess.add(vid)
             
+        sess.flush()
+        _upsert_video_snapshots(sess, snapshots)
+        _upsert_video_metrics(sess, metrics)
+        _upsert_cached_responses(sess, cache_entries)
+        _bump_data_version(sess)
         sess.commit()
         logger.info(f"Saved {len(videos)} videos with history for channel {channel_id}")
+        return len(metrics)
         
     except Exception as e:
         sess.rollback()
@@ -201,36 +735,515 @@ def save_videos(channel_id: str, videos: List[dict]):
     finally:
         sess.close()
 
-def get_channel_subscriber_history(channel_id: str) -> List[Dict]:
-    """Get subscriber history for a channel"""
+def _prefetch_video_stats(sess, video_ids: List[str]) -> Dict[str, Tuple]:
+    """Load (view_count, like_count, comment_count, published_at, channel_id) of stored videos by ID"""
+    current = {}
+    for i in range(0, len(video_ids), SQLITE_IN_BATCH_SIZE):
+        batch_ids = video_ids[i:i + SQLITE_IN_BATCH_SIZE]
+        rows = sess.query(
+            Video.id, Video.view_count, Video.like_count, Video.comment_count, Video.published_at, Video.channel_id
+        ).filter(Video.id.in_(batch_ids))
+        for video_id, *values in rows:
+            current[video_id] = tuple(values)
+    return current
+
+def save_video_statistics(videos: List[dict], cache_entries: Optional[Dict[str, Tuple[str, bytes]]] = None) -> Set[str]:
+    """Bulk-update counters and today's snapshot for stored videos from statistics-only API items.
+
+    The ETag `cache_entries` of their responses are stored in the same transaction.
+
+    Returns the IDs of the channels with at least one video whose metrics were recomputed
+    (statistics changed, or metrics computed before today).
+    """
+    if not videos:
+        return set()
     sess = Session()
     try:
-        channel = sess.query(Channel).get(channel_id)
-        if not channel:
-            return []
-        return parse_history_json(channel.subscriber_history)
+        today = date.today()
+        fetched_at = datetime.utcnow()
+        current = _prefetch_video_stats(sess, [v["id"] for v in videos])
+        metrics_computed_at = _prefetch_metrics_computed_at(sess, list(current))
+        rows = []
+        snapshots = []
+        metrics = []
+        changed_channel_ids = set()
+        for v in videos:
+            if v["id"] not in current:
+                logger.warning(f"Skipping statistics for unknown video {v['id']}")
+                continue
+            stats = v["statistics"]
+            new_view_count = int(stats.get("viewCount", 0))
+            new_like_count = int(stats.get("likeCount", 0))
+            new_comment_count = int(stats.get("commentCount", 0))
+            old_view_count, old_like_count, old_comment_count, published_at, channel_id = current[v["id"]]
+            stats_changed = (old_view_count, old_like_count, old_comment_count) != (new_view_count, new_like_count, new_comment_count)
+            if stats_changed or _metrics_stale(metrics_computed_at.get(v["id"]), fetched_at):
+                changed_channel_ids.add(channel_id)
+                metrics.append(_video_metrics_row(
+                    v["id"], new_view_count, new_like_count, new_comment_count, published_at, fetched_at
+                ))
+            rows.append({
+                "b_id": v["id"],
+                "b_view_count": new_view_count,
+                "b_like_count": new_like_count,
+                "b_comment_count": new_comment_count,
+                "b_fetched_at": fetched_at,
+            })
+            snapshots.append({
+                "video_id": v["id"],
+                "date": today,
+                "views": new_view_count,
+                "likes": new_like_count,
+                "comments": new_comment_count,
+            })
+
+        videos_table = Video.__table__
+        stmt = update(videos_table).where(videos_table.c.id == bindparam("b_id")).values(
+            view_count=bindparam("b_view_count"),
+            like_count=bindparam("b_like_count"),
+            comment_count=bindparam("b_comment_count"),
+            fetched_at=bindparam("b_fetched_at"),
+        )
+        if rows:
+            sess.connection().execute(stmt, rows)
+        _upsert_video_snapshots(sess, snapshots)
+        _upsert_video_metrics(sess, metrics)
+        _upsert_cached_responses(sess, cache_entries)
+        _bump_data_version(sess)
+        sess.commit()
+        logger.info(f"Saved statistics for {len(videos)} videos")
+        return changed_channel_ids
+
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error saving video statistics: {e}")
+        raise
     finally:
         sess.close()
 
-def get_channel_view_history(channel_id: str) -> List[Dict]:
-    """Get view count history for a channel"""
+def update_channel_tiers(channel_ids: Optional[Iterable[str]], gold_threshold: float, bronze_threshold: float,
+                         by_age_cohort: bool = False) -> int:
+    """Recompute gold/silver/bronze tiers for the given channels (every channel if None).
+
+    Videos are ranked against their own channel, so channels are processed independently.
+    Hidden videos get no tier. Returns the number of videos tiered.
+    """
+    if channel_ids is None:
+        channel_batches = [None]
+    else:
+        channel_ids = sorted(set(channel_ids))
+        if not channel_ids:
+            return 0
+        channel_batches = [channel_ids[i:i + SQLITE_IN_BATCH_SIZE] for i in range(0, len(channel_ids), SQLITE_IN_BATCH_SIZE)]
+
+    metrics_table = VideoMetrics.__table__
+    stmt = update(metrics_table).where(metrics_table.c.video_id == bindparam("b_video_id")).values(
+        tier=bindparam("b_tier"),
+        tier_score=bindparam("b_tier_score"),
+    )
     sess = Session()
     try:
-        channel = sess.query(Channel).get(channel_id)
-        if not channel:
-            return []
-        return parse_history_json(channel.view_count_history)
+        tiered = 0
+        for batch in channel_batches:
+            query = sess.query(
+                Video.id, Video.channel_id, Video.view_count,
+                VideoMetrics.views_per_day, VideoMetrics.engagement_rate, VideoMetrics.days_since_publish
+            ).join(VideoMetrics, VideoMetrics.video_id == Video.id).filter(Video.hidden == False)
+            hidden_ids = sess.query(Video.id).filter(Video.hidden == True)
+            if batch is not None:
+                query = query.filter(Video.channel_id.in_(batch))
+                hidden_ids = hidden_ids.filter(Video.channel_id.in_(batch))
+
+            videos = pd.DataFrame(query.all(), columns=[
+                "id", "channel_id", "view_count", "views_per_day", "engagement_rate", "days_since_publish"
+            ])
+            tiers = compute_tiers(videos, gold_threshold, bronze_threshold, by_age_cohort=by_age_cohort)
+            rows = [
+                {"b_video_id": video_id, "b_tier": tier, "b_tier_score": float(score)}
+                for video_id, tier, score in zip(videos["id"], tiers["tier"], tiers["tier_score"])
+            ]
+            if rows:
+                sess.connection().execute(stmt, rows)
+            sess.query(VideoMetrics).filter(VideoMetrics.video_id.in_(hidden_ids.scalar_subquery())).update(
+                {VideoMetrics.tier: None, VideoMetrics.tier_score: None}, synchronize_session=False
+            )
+            tiered += len(rows)
+
+        _bump_data_version(sess)
+        sess.commit()
+        logger.info(f"Updated tiers of {tiered} videos")
+        return tiered
+
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error updating tiers: {e}")
+        raise
+    finally:
+        sess.close()
+
+def get_untiered_channel_ids() -> Set[str]:
+    """Channels with visible videos that have not been tiered yet"""
+    sess = Session()
+    try:
+        rows = sess.query(Video.channel_id).join(VideoMetrics, VideoMetrics.video_id == Video.id).filter(
+            Video.hidden == False, VideoMetrics.tier == None
+        ).distinct()
+        return {channel_id for (channel_id,) in rows}
     finally:
         sess.close()
 
-def get_video_view_history(video_id: str) -> List[Dict]:
+def _query_history_arrays(count_column, key_column, key: str, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> HistoryArrays:
+    """Read a snapshot series as (dates as datetime64[D], counts as int64) arrays sorted by date"""
+    sess = Session()
+    try:
+        model = key_column.class_
+        query = sess.query(model.date, count_column).filter(key_column == key, count_column != None)
+        if start_date:
+            query = query.filter(model.date >= date.fromisoformat(start_date))
+        if end_date:
+            query = query.filter(model.date <= date.fromisoformat(end_date))
+
+        rows = query.order_by(model.date).all()
+        dates = np.array([point_date for point_date, _ in rows], dtype="datetime64[D]")
+        counts = np.fromiter((count for _, count in rows), dtype=np.int64, count=len(rows))
+        return dates, counts
+    finally:
+        sess.close()
+
+def _query_history(count_column, key_column, key: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """Read a snapshot series as [{"date": "2025-01-01", "count": 1000}, ...], optionally limited to a date range"""
+    return arrays_to_points(*_query_history_arrays(count_column, key_column, key, start_date, end_date))
+
+def get_channel_history_arrays(channel_id: str) -> Tuple[HistoryArrays, HistoryArrays]:
+    """Get (subscriber, view count) histories of a channel as arrays, for charts"""
+    return (
+        _query_history_arrays(ChannelStatsSnapshot.subscribers, ChannelStatsSnapshot.channel_id, channel_id),
+        _query_history_arrays(ChannelStatsSnapshot.views, ChannelStatsSnapshot.channel_id, channel_id),
+    )
+
+def get_video_view_history_arrays(video_id: str) -> HistoryArrays:
+    """Get the view count history of a video as arrays, for charts"""
+    return _query_history_arrays(VideoStatsSnapshot.views, VideoStatsSnapshot.video_id, video_id)
+
+def get_channel_subscriber_history(channel_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """Get subscriber history for a channel"""
+    return _query_history(ChannelStatsSnapshot.subscribers, ChannelStatsSnapshot.channel_id, channel_id, start_date, end_date)
+
+def get_channel_view_history(channel_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """Get view count history for a channel"""
+    return _query_history(ChannelStatsSnapshot.views, ChannelStatsSnapshot.channel_id, channel_id, start_date, end_date)
+
+def get_video_view_history(video_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
     """Get view count history for a video"""
+    return _query_history(VideoStatsSnapshot.views, VideoStatsSnapshot.video_id, video_id, start_date, end_date)
+
+def get_video_like_history(video_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """Get like count history for a video"""
+    return _query_history(VideoStatsSnapshot.likes, VideoStatsSnapshot.video_id, video_id, start_date, end_date)
+
+def get_video_comment_history(video_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """Get comment count history for a video"""
+    return _query_history(VideoStatsSnapshot.comments, VideoStatsSnapshot.video_id, video_id, start_date, end_date)
+
+def get_cached_channel_id(identifier: str, max_age: timedelta) -> Optional[str]:
+    """Get the cached channel ID for an identifier, None if missing or older than max_age"""
+    sess = Session()
+    try:
+        entry = sess.query(ChannelIdentifier).get(identifier)
+        if not entry or entry.resolved_at < datetime.utcnow() - max_age:
+            return None
+        return entry.channel_id
+    finally:
+        sess.close()
+
+def save_channel_identifiers(resolved: Dict[str, str], invalidated: Iterable[str] = ()):
+    """Store (or refresh) identifier resolutions and drop the invalidated ones, in one transaction"""
+    invalidated = [identifier for identifier in invalidated if identifier not in resolved]
+    if not resolved and not invalidated:
+        return
     sess = Session()
     try:
-        video = sess.query(Video).get(video_id)
-        if not video:
-            return []
-        return parse_history_json(video.view_count_history)
+        if resolved:
+            stmt = sqlite_insert(ChannelIdentifier)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ChannelIdentifier.identifier],
+                set_={"channel_id": stmt.excluded.channel_id, "resolved_at": stmt.excluded.resolved_at},
+            )
+            now = datetime.utcnow()
+            sess.execute(stmt, [
+                {"identifier": identifier, "channel_id": channel_id, "resolved_at": now}
+                for identifier, channel_id in resolved.items()
+            ])
+        if invalidated:
+            sess.query(ChannelIdentifier).filter(
+                ChannelIdentifier.identifier.in_(invalidated)
+            ).delete(synchronize_session=False)
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error caching channel IDs: {e}")
+    finally:
+        sess.close()
+
+def invalidate_channel_identifier(identifier: Optional[str] = None):
+    """Drop a cached identifier resolution, or the whole cache if no identifier is given"""
+    sess = Session()
+    try:
+        query = sess.query(ChannelIdentifier)
+        if identifier is not None:
+            query = query.filter(ChannelIdentifier.identifier == identifier)
+        query.delete()
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error invalidating channel identifier cache: {e}")
+        raise
+    finally:
+        sess.close()
+
+def get_quota_usage(day: date) -> int:
+    """Get the quota units already spent on a given quota day"""
+    sess = Session()
+    try:
+        usage = sess.query(QuotaUsage).get(day)
+        return usage.units_used if usage else 0
+    finally:
+        sess.close()
+
+def save_quota_usage(day: date, units_used: int):
+    """Persist the quota units spent on a given quota day"""
+    sess = Session()
+    try:
+        usage = sess.query(QuotaUsage).get(day) or QuotaUsage(day=day)
+        usage.units_used = units_used
+        usage.updated_at = datetime.utcnow()
+        sess.add(usage)
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error saving quota usage: {e}")
+    finally:
+        sess.close()
+
+def get_channels_last_fetched(identifiers: List[str]) -> Dict[str, Optional[datetime]]:
+    """Map channels.txt identifiers to the last time their channel was fetched (None if never)"""
+    sess = Session()
+    try:
+        resolved = {
+            entry.identifier: entry.channel_id
+            for entry in sess.query(ChannelIdentifier)
+        }
+        fetched_at = dict(sess.query(Channel.id, Channel.fetched_at))
+        return {
+            identifier: fetched_at.get(identifier if identifier.startswith("UC") else resolved.get(identifier))
+            for identifier in identifiers
+        }
+    finally:
+        sess.close()
+
+def get_cached_response(request_key: str) -> Optional[Tuple[str, bytes]]:
+    """Get the (etag, payload) stored for an API request, None if never cached"""
+    sess = Session()
+    try:
+        entry = sess.query(ApiResponseCache).get(request_key)
+        return (entry.etag, entry.payload) if entry else None
+    finally:
+        sess.close()
+
+def _upsert_cached_responses(sess, entries: Optional[Dict[str, Tuple[str, bytes]]]):
+    """Store the latest (etag, payload) of API requests, in the transaction that saves the rows they cover.
+
+    Entries served after a 304 come back unchanged, which marks them as used.
+    """
+    if not entries:
+        return
+    stmt = sqlite_insert(ApiResponseCache)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ApiResponseCache.request_key],
+        set_={"etag": stmt.excluded.etag, "payload": stmt.excluded.payload, "fetched_at": stmt.excluded.fetched_at},
+    )
+    now = datetime.utcnow()
+    sess.execute(stmt, [
+        {"request_key": key, "etag": etag, "payload": payload, "fetched_at": now}
+        for key, (etag, payload) in entries.items()
+    ])
+
+def prune_cached_responses(max_age: timedelta) -> int:
+    """Delete cached API responses neither fetched nor served within `max_age`, return how many"""
+    sess = Session()
+    try:
+        deleted = sess.query(ApiResponseCache).filter(
+            ApiResponseCache.fetched_at < datetime.utcnow() - max_age
+        ).delete(synchronize_session=False)
+        sess.commit()
+        return deleted
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error pruning cached API responses: {e}")
+        raise
+    finally:
+        sess.close()
+
+def start_update_run(identifiers: List[str]) -> int:
+    """Record a new update run with every identifier pending, return its ID"""
+    sess = Session()
+    try:
+        run = UpdateRun(started_at=datetime.utcnow(), status=RUN_RUNNING)
+        sess.add(run)
+        sess.flush()
+        sess.add_all([
+            UpdateRunChannel(run_id=run.id, identifier=identifier, position=position, status=CHANNEL_PENDING)
+            for position, identifier in enumerate(identifiers)
+        ])
+        sess.commit()
+        return run.id
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error starting update run: {e}")
+        raise
+    finally:
+        sess.close()
+
+def resume_update_run() -> Optional[Tuple[int, List[str]]]:
+    """Reopen the latest unfinished run, None if there is none.
+
+    Returns (run ID, identifiers not done yet in run order).
+    """
+    sess = Session()
+    try:
+        run = sess.query(UpdateRun).order_by(UpdateRun.id.desc()).first()
+        if run is None or run.status == RUN_COMPLETED:
+            return None
+        left = sess.query(UpdateRunChannel.identifier).filter(
+            UpdateRunChannel.run_id == run.id, UpdateRunChannel.status != CHANNEL_DONE
+        ).order_by(UpdateRunChannel.position).all()
+        run.status = RUN_RUNNING
+        run.finished_at = None
+        run.resumed_count += 1
+        sess.commit()
+        return run.id, [identifier for (identifier,) in left]
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error resuming update run: {e}")
+        raise
+    finally:
+        sess.close()
+
+def record_run_channel(run_id: int, identifier: str, status: str, channel_id: Optional[str] = None,
+                       error: Optional[BaseException] = None):
+    """Checkpoint the outcome of one channel, committed right away so a crash keeps it"""
+    sess = Session()
+    try:
+        entry = sess.query(UpdateRunChannel).get((run_id, identifier))
+        if entry is None:
+            logger.warning(f"Channel {identifier} is not part of update run {run_id}")
+            return
+        entry.status = status
+        entry.channel_id = channel_id or entry.channel_id
+        entry.attempts += 1
+        entry.updated_at = datetime.utcnow()
+        entry.error_class = type(error).__name__ if error is not None else None
+        entry.error_message = str(error)[:1000] if error is not None else None
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error recording run status of channel {identifier}: {e}")
+    finally:
+        sess.close()
+
+def finish_update_run(run_id: int) -> Dict[str, int]:
+    """Close a run, completed only if every channel is done. Returns the channel count per status"""
+    sess = Session()
+    try:
+        counts = dict(sess.query(UpdateRunChannel.status, func.count()).filter(
+            UpdateRunChannel.run_id == run_id
+        ).group_by(UpdateRunChannel.status))
+        run = sess.query(UpdateRun).get(run_id)
+        run.status = RUN_COMPLETED if set(counts) <= {CHANNEL_DONE} else RUN_INCOMPLETE
+        run.finished_at = datetime.utcnow()
+        sess.commit()
+        return counts
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error finishing update run {run_id}: {e}")
+        raise
+    finally:
+        sess.close()
+
+def get_update_run_channels(run_id: Optional[int] = None) -> List[Dict]:
+    """Per-channel ledger of a run (the latest one by default), in processing order"""
+    sess = Session()
+    try:
+        if run_id is None:
+            run_id = sess.query(func.max(UpdateRun.id)).scalar()
+            if run_id is None:
+                return []
+        rows = sess.query(
+            UpdateRunChannel.identifier, UpdateRunChannel.channel_id, UpdateRunChannel.status,
+            UpdateRunChannel.attempts, UpdateRunChannel.updated_at,
+            UpdateRunChannel.error_class, UpdateRunChannel.error_message
+        ).filter(UpdateRunChannel.run_id == run_id).order_by(UpdateRunChannel.position)
+        return [row._asdict() for row in rows]
+    finally:
+        sess.close()
+
+def get_stale_snippets(channel_id: str, max_age: timedelta) -> Tuple[bool, Set[str]]:
+    """Tell whether the channel snippet needs a refresh, and which of its videos do"""
+    sess = Session()
+    try:
+        threshold = datetime.utcnow() - max_age
+        channel = sess.query(Channel.snippet_fetched_at).filter(Channel.id == channel_id).first()
+        channel_is_stale = channel is None or channel.snippet_fetched_at is None or channel.snippet_fetched_at < threshold
+        stale_video_ids = {
+            video_id for (video_id,) in sess.query(Video.id).filter(
+                Video.channel_id == channel_id,
+                (Video.snippet_fetched_at == None) | (Video.snippet_fetched_at < threshold)
+            )
+        }
+        return channel_is_stale, stale_video_ids
+    finally:
+        sess.close()
+
+def is_uploads_walk_complete(channel_id: str) -> bool:
+    """Tell whether the last walk of the channel's uploads got through, so that no older page is missing"""
+    sess = Session()
+    try:
+        return bool(sess.query(Channel.uploads_walk_complete).filter(Channel.id == channel_id).scalar())
+    finally:
+        sess.close()
+
+def set_uploads_walk_complete(channel_id: str, complete: bool):
+    """Record that a walk of the channel's uploads started (False) or got through (True)"""
+    sess = Session()
+    try:
+        sess.query(Channel).filter(Channel.id == channel_id).update(
+            {Channel.uploads_walk_complete: complete}, synchronize_session=False
+        )
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error recording the uploads walk of channel {channel_id}: {e}")
+        raise
+    finally:
+        sess.close()
+
+def get_known_video_ids(channel_id: str) -> Set[str]:
+    """Get the IDs of all stored videos for a channel (hidden ones included)"""
+    sess = Session()
+    try:
+        return {video_id for (video_id,) in sess.query(Video.id).filter(Video.channel_id == channel_id)}
+    finally:
+        sess.close()
+
+def get_tracked_video_ids(include_hidden: bool = False) -> List[str]:
+    """Get the IDs of all stored videos across channels, non-hidden only by default"""
+    sess = Session()
+    try:
+        query = sess.query(Video.id)
+        if not include_hidden:
+            query = query.filter(Video.hidden == False)
+        return [video_id for (video_id,) in query.order_by(Video.channel_id, Video.id)]
     finally:
         sess.close()
 
@@ -238,19 +1251,181 @@ def get_channel_video_publication_dates(channel_id: str) -> List[Dict]:
     """Get publication dates and titles of all videos for a channel (for timeline markers)"""
     sess = Session()
     try:
-        videos = sess.query(Video).filter(
+        videos = sess.query(Video.id, Video.title, Video.published_at).filter(
             Video.channel_id == channel_id,
             Video.hidden == False
-        ).order_by(Video.published_at).all()
+        ).order_by(Video.published_at)
         
         return [
             {
-                "date": video.published_at.strftime("%Y-%m-%d"),
-                "title": video.title,
-                "video_id": video.id
+                "date": published_at.strftime("%Y-%m-%d"),
+                "title": title,
+                "video_id": video_id
             }
-            for video in videos
+            for video_id, title, published_at in videos
         ]
     finally:
         sess.close()
 
+CHANNEL_SUMMARY_COLUMNS = [
+    Channel.id, Channel.title, Channel.subscribers, Channel.video_count, Channel.view_count, Channel.fetched_at
+]
+
+def get_channels_data() -> List[Dict]:
+    """Get a summary of all channels (no description) as plain dicts, ordered by title"""
+    sess = Session()
+    try:
+        channels = sess.query(*CHANNEL_SUMMARY_COLUMNS).order_by(Channel.title)
+        return [row._asdict() for row in channels]
+    finally:
+        sess.close()
+
+def get_channel_data(channel_id: str) -> Optional[Dict]:
+    """Get every displayed field of a single channel, description included"""
+    sess = Session()
+    try:
+        row = sess.query(*CHANNEL_SUMMARY_COLUMNS, Channel.description).filter(Channel.id == channel_id).first()
+        return row._asdict() if row else None
+    finally:
+        sess.close()
+
+VIDEO_SORT_COLUMNS = {
+    "published_at": Video.published_at,
+    "title": Video.title,
+    "view_count": Video.view_count,
+    "like_count": Video.like_count,
+    "comment_count": Video.comment_count,
+    "engagement": VideoMetrics.engagement_rate,
+    "like_rate": VideoMetrics.like_rate,
+    "views_per_day": VideoMetrics.views_per_day,
+    "tier_score": VideoMetrics.tier_score,
+}
+
+def query_videos_page(channel_id: str, hidden: bool = False, page: int = 0, page_size: int = 50,
+                      sort_by: str = "published_at", descending: bool = True,
+                      published_after: Optional[datetime] = None, published_before: Optional[datetime] = None,
+                      min_views: Optional[int] = None, max_views: Optional[int] = None,
+                      min_engagement: Optional[float] = None, max_engagement: Optional[float] = None,
+                      tiers: Optional[List[str]] = None) -> Tuple[List[Dict], int]:
+    """Get one page of a channel's videos, sorted and filtered in SQL.
+
+    Only list columns are loaded (no description, analysis or history). Returns the
+    page rows as plain dicts and the total number of videos matching the filters.
+    """
+    if sort_by not in VIDEO_SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort_by}")
+
+    sess = Session()
+    try:
+        filters = [Video.channel_id == channel_id, Video.hidden == hidden]
+        if published_after is not None:
+            filters.append(Video.published_at >= published_after)
+        if published_before is not None:
+            filters.append(Video.published_at <= published_before)
+        if min_views is not None:
+            filters.append(Video.view_count >= min_views)
+        if max_views is not None:
+            filters.append(Video.view_count <= max_views)
+        if min_engagement is not None:
+            filters.append(VideoMetrics.engagement_rate >= min_engagement)
+        if max_engagement is not None:
+            filters.append(VideoMetrics.engagement_rate <= max_engagement)
+        if tiers:
+            filters.append(VideoMetrics.tier.in_(tiers))
+
+        total = sess.query(func.count(Video.id)).outerjoin(
+            VideoMetrics, VideoMetrics.video_id == Video.id
+        ).filter(*filters).scalar()
+
+        sort_column = VIDEO_SORT_COLUMNS[sort_by]
+        order = sort_column.desc() if descending else sort_column.asc()
+        rows = sess.query(
+            Video.id, Video.title, Video.published_at,
+            Video.view_count, Video.like_count, Video.comment_count,
+            VideoMetrics.engagement_rate.label("engagement"), VideoMetrics.like_rate, VideoMetrics.tier
+        ).outerjoin(
+            VideoMetrics, VideoMetrics.video_id == Video.id
+        ).filter(*filters).order_by(order, Video.id).limit(page_size).offset(page * page_size)
+
+        return [row._asdict() for row in rows], total
+    finally:
+        sess.close()
+
+def get_video_data(video_id: str) -> Optional[Dict]:
+    """Get every displayed field of a single video, description and analysis included"""
+    sess = Session()
+    try:
+        row = sess.query(
+            Video.id, Video.channel_id, Video.title, Video.description, Video.published_at,
+            Video.view_count, Video.like_count, Video.comment_count, Video.hidden, Video.analysis,
+            *[getattr(VideoMetrics, name) for name in VIDEO_METRIC_COLUMNS + VIDEO_TIER_COLUMNS]
+        ).outerjoin(VideoMetrics, VideoMetrics.video_id == Video.id).filter(Video.id == video_id).first()
+        return row._asdict() if row else None
+    finally:
+        sess.close()
+
+def query_top_videos(sort_by: str = "engagement", limit: int = 50, min_views: int = 0,
+                     channel_ids: Optional[List[str]] = None, include_hidden: bool = False) -> List[Dict]:
+    """Rank videos across channels by a stored metric (e.g. engagement), computed entirely in SQL"""
+    if sort_by not in VIDEO_SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort_by}")
+
+    sess = Session()
+    try:
+        query = sess.query(
+            Video.id, Video.channel_id, Video.title, Video.published_at,
+            Video.view_count, Video.like_count, Video.comment_count,
+            *[getattr(VideoMetrics, name) for name in VIDEO_METRIC_COLUMNS + VIDEO_TIER_COLUMNS]
+        ).join(VideoMetrics, VideoMetrics.video_id == Video.id).filter(Video.view_count >= min_views)
+        if channel_ids is not None:
+            query = query.filter(Video.channel_id.in_(channel_ids))
+        if not include_hidden:
+            query = query.filter(Video.hidden == False)
+        sort_column = VIDEO_SORT_COLUMNS[sort_by]
+        return [row._asdict() for row in query.order_by(sort_column.desc(), Video.id).limit(limit)]
+    finally:
+        sess.close()
+
+def _update_video(video_id: str, values: Dict):
+    sess = Session()
+    try:
+        sess.query(Video).filter(Video.id == video_id).update(values)
+        _bump_data_version(sess)
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error updating video {video_id}: {e}")
+        raise
+    finally:
+        sess.close()
+
+def set_video_hidden(video_id: str, hidden: bool):
+    """Hide or restore a video"""
+    _update_video(video_id, {"hidden": hidden})
+
+def set_video_analysis(video_id: str, analysis: Optional[str]):
+    """Save (or delete with None) the personal analysis of a video"""
+    _update_video(video_id, {"analysis": analysis})
+
+def delete_channel(channel_id: str):
+    """Delete a channel with all its videos, their history and derived metrics"""
+    sess = Session()
+    try:
+        channel_video_ids = sess.query(Video.id).filter(Video.channel_id == channel_id)
+        sess.query(VideoStatsSnapshot).filter(
+            VideoStatsSnapshot.video_id.in_(channel_video_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        sess.query(VideoMetrics).filter(
+            VideoMetrics.video_id.in_(channel_video_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        sess.query(ChannelStatsSnapshot).filter(ChannelStatsSnapshot.channel_id == channel_id).delete()
+        sess.query(Video).filter(Video.channel_id == channel_id).delete()
+        sess.query(Channel).filter(Channel.id == channel_id).delete()
+        _bump_data_version(sess)
+        sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error(f"Error deleting channel {channel_id}: {e}")
+        raise
+    finally:
+        sess.close()
@@ -0,0 +1,59 @@
+from app.data.storage import get_cached_channel_id, save_channel_identifiers
+from datetime import timedelta
+from typing import Dict, Optional, Set
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelIdCache:
+    """Cache of channels.txt identifiers resolved to channel IDs, persisted in SQLite.
+
+    Shared by the API worker threads, which only read from the database: new resolutions
+    and invalidations are buffered until the writer stage calls `flush()`.
+    """
+
+    def __init__(self):
+        self._resolved: Dict[str, str] = {}
+        self._invalidated: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, identifier: str, max_age: timedelta) -> Optional[str]:
+        """Channel ID of an identifier, None if unknown, invalidated or older than max_age"""
+        with self._lock:
+            if identifier in self._resolved:
+                return self._resolved[identifier]
+            if identifier in self._invalidated:
+                return None
+        return get_cached_channel_id(identifier, max_age)
+
+    def put(self, identifier: str, channel_id: str):
+        with self._lock:
+            self._resolved[identifier] = channel_id
+            self._invalidated.discard(identifier)
+
+    def invalidate(self, identifier: str):
+        with self._lock:
+            self._resolved.pop(identifier, None)
+            self._invalidated.add(identifier)
+
+    def flush(self):
+        """Persist the buffered resolutions. Only called from the writer stage."""
+        with self._lock:
+            resolved, self._resolved = self._resolved, {}
+            invalidated, self._invalidated = self._invalidated, set()
+        save_channel_identifiers(resolved, invalidated)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_channel_id_cache() -> ChannelIdCache:
+    """Identifier cache shared by every YouTubeAPIService of the process"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ChannelIdCache()
+        return _default_cache
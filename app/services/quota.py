@@ -0,0 +1,149 @@
+from googleapiclient.errors import HttpError
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+from config import config
+from app.data.storage import get_quota_usage, save_quota_usage
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# YouTube Data API v3 cost in quota units per call
+ENDPOINT_COSTS: Dict[str, int] = {
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "videos.list": 1,
+    "search.list": 100,
+}
+DEFAULT_COST = 1
+
+QUOTA_ERROR_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+
+class QuotaExceededError(Exception):
+    """Raised when a request would go over the daily quota budget"""
+
+
+def quota_day() -> date:
+    """The API quota resets at midnight Pacific Time"""
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo("America/Los_Angeles")).date()
+    except Exception:
+        # No tz database available (e.g. Windows without tzdata): use PST
+        return datetime.now(timezone(timedelta(hours=-8))).date()
+
+
+def get_error_reason(error: HttpError) -> Optional[str]:
+    """Extract the first error reason (e.g. 'quotaExceeded') from an HttpError"""
+    try:
+        details = error.error_details
+        if details and isinstance(details, list):
+            return details[0].get("reason")
+    except AttributeError:
+        pass
+    return None
+
+
+class QuotaScheduler:
+    """Runs API requests against a daily quota budget shared by all threads.
+
+    Each request is charged before it is sent (the API charges failed calls too).
+    Usage is persisted per quota day so consecutive runs share the same budget.
+    Worker threads never write: usage is only saved by `flush()`, called from the writer stage.
+    """
+
+    def __init__(self, daily_budget: Optional[int] = None):
+        self.daily_budget = daily_budget if daily_budget is not None else config.DAILY_QUOTA_BUDGET
+        self.cost_by_endpoint = Counter()
+        self._lock = threading.Lock()
+        self._day = quota_day()
+        self._used = get_quota_usage(self._day)
+        self._dirty = False
+        self._unsaved_days = {}  # Usage of past quota days not flushed yet
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            self._roll_day()
+            return self._used
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll_day()
+            return max(0, self.daily_budget - self._used)
+
+    def _roll_day(self):
+        today = quota_day()
+        if today != self._day:
+            if self._dirty:
+                self._unsaved_days[self._day] = self._used
+                self._dirty = False
+            self._day = today
+            self._used = get_quota_usage(today)
+
+    def _reserve(self, endpoint: str) -> int:
+        cost = ENDPOINT_COSTS.get(endpoint, DEFAULT_COST)
+        with self._lock:
+            self._roll_day()
+            if self._used + cost > self.daily_budget:
+                raise QuotaExceededError(
+                    f"Daily quota budget exhausted ({self._used}/{self.daily_budget} units used, {endpoint} costs {cost})"
+                )
+            self._used += cost
+            self._dirty = True
+            self.cost_by_endpoint[endpoint] += cost
+        return cost
+
+    def mark_exhausted(self):
+        """The API reported the quota as exceeded: stop sending requests for today"""
+        with self._lock:
+            self._used = max(self._used, self.daily_budget)
+            self._dirty = True
+
+    def execute(self, request):
+        """Charge and execute a googleapiclient request"""
+        endpoint = getattr(request, "methodId", "") or ""
+        endpoint = endpoint.split(".", 1)[-1]  # 'youtube.videos.list' -> 'videos.list'
+        self._reserve(endpoint)
+        try:
+            return request.execute()
+        except HttpError as e:
+            if get_error_reason(e) in QUOTA_ERROR_REASONS:
+                logger.error(f"YouTube API quota exceeded on {endpoint}")
+                self.mark_exhausted()
+                raise QuotaExceededError(f"YouTube API quota exceeded on {endpoint}") from e
+            raise
+
+    def flush(self):
+        """Persist the units used today"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        for day, used in self._unsaved_days.items():
+            save_quota_usage(day, used)
+        self._unsaved_days.clear()
+        if self._dirty:
+            save_quota_usage(self._day, self._used)
+            self._dirty = False
+
+    def summary(self) -> str:
+        with self._lock:
+            per_endpoint = ", ".join(f"{name}: {cost}" for name, cost in sorted(self.cost_by_endpoint.items()))
+            return f"{self._used}/{self.daily_budget} units used for {self._day} ({per_endpoint or 'no calls'})"
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> QuotaScheduler:
+    """Scheduler shared by every YouTubeAPIService of the process"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = QuotaScheduler()
+        return _default_scheduler
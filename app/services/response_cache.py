@@ -0,0 +1,121 @@
+from googleapiclient.errors import HttpError
+from app.data.storage import get_cached_response, prune_cached_responses
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import json
+import logging
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Set on responses (and their items) served from the cache after a 304 Not Modified
+NOT_MODIFIED_KEY = "_not_modified"
+# Set on responses and their items: the (key, etag, payload) cache entry to store along with them
+CACHE_ENTRY_KEY = "_cache_entry"
+
+
+def cache_key(uri: str) -> str:
+    """Normalize a request URI into a cache key: sorted query string, API key removed"""
+    parts = urlsplit(uri)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query) if name != "key")
+    return f"{parts.path}?{urlencode(query)}"
+
+
+def is_not_modified(data: Dict) -> bool:
+    """True if a response or item was served from the cache because the resource did not change"""
+    return bool(data.get(NOT_MODIFIED_KEY))
+
+
+def compact_response(response: Dict) -> Dict:
+    """What is worth keeping of a response for a later 304: item IDs and statistics.
+
+    Items served after a 304 still update fetched_at and today's snapshot from their
+    statistics; snippets would only bloat the cache.
+    """
+    return {
+        "items": [
+            {key: item[key] for key in ("id", "statistics") if key in item}
+            for item in response.get("items", []) if "id" in item
+        ]
+    }
+
+
+def cache_entries(items: Iterable[Dict]) -> Dict[str, Tuple[str, bytes]]:
+    """The (etag, payload) cache entries of the responses `items` came from, by request key"""
+    entries = {}
+    for item in items:
+        entry = item.get(CACHE_ENTRY_KEY)
+        if entry:
+            key, etag, payload = entry
+            entries[key] = (etag, payload)
+    return entries
+
+
+def _tag(response: Dict, entry: Tuple[str, str, bytes], not_modified: bool = False) -> Dict:
+    for data in [response] + response.get("items", []):
+        data[CACHE_ENTRY_KEY] = entry
+        if not_modified:
+            data[NOT_MODIFIED_KEY] = True
+    return response
+
+
+class ResponseCache:
+    """ETag cache for API list calls, persisted in SQLite.
+
+    Known requests are sent with If-None-Match. When the API answers 304, the stored
+    payload is returned flagged with NOT_MODIFIED_KEY.
+
+    The cache itself only reads from the database. Responses and their items carry their
+    entry under CACHE_ENTRY_KEY, and the writer stage stores it in the same transaction
+    as the rows it covers (see cache_entries), so an ETag is never saved for data that
+    was not. Entries unused for a while are dropped by `prune()`.
+    """
+
+    def execute(self, request, send: Callable):
+        """Execute `request` through `send` (e.g. the quota scheduler) with a conditional GET"""
+        key = cache_key(request.uri)
+        cached = get_cached_response(key)
+        if cached:
+            etag, payload = cached
+            cached_response = json.loads(zlib.decompress(payload))
+            # Entries cached before statistics were kept cannot stand in for a response
+            if all("statistics" in item for item in cached_response.get("items", [])):
+                request.headers["If-None-Match"] = etag
+            else:
+                cached = None
+
+        try:
+            response = send(request)
+        except HttpError as e:
+            if cached and e.resp.status == 304:
+                logger.debug(f"Not modified: {key}")
+                return _tag(cached_response, (key, etag, payload), not_modified=True)
+            raise
+
+        etag = response.get("etag")
+        if etag:
+            payload = zlib.compress(json.dumps(compact_response(response)).encode("utf-8"))
+            _tag(response, (key, etag, payload))
+        return response
+
+    def prune(self, max_age: timedelta) -> int:
+        """Drop the entries neither fetched nor served within `max_age`"""
+        deleted = prune_cached_responses(max_age)
+        if deleted:
+            logger.info(f"Dropped {deleted} cached API responses unused for {max_age.days} days")
+        return deleted
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache() -> ResponseCache:
+    """Response cache shared by every YouTubeAPIService of the process"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
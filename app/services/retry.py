@@ -0,0 +1,112 @@
+from googleapiclient.errors import HttpError
+from collections import Counter
+from http.client import HTTPException
+from typing import Callable, Optional
+from config import config
+from app.services.quota import QUOTA_ERROR_REASONS, QuotaExceededError, get_error_reason
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: throttling and server-side failures
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Error reasons the API documents as transient (often sent with a 403)
+RETRYABLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError", "internalError"}
+# Network failures: connection reset/refused, socket timeout, truncated response
+RETRYABLE_EXCEPTIONS = (ConnectionError, TimeoutError, HTTPException)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Tell whether a failed request may succeed if sent again"""
+    if isinstance(error, QuotaExceededError):
+        return False
+    if isinstance(error, HttpError):
+        reason = get_error_reason(error)
+        if reason in QUOTA_ERROR_REASONS:
+            return False
+        if reason in RETRYABLE_REASONS:
+            return True
+        return error.resp.status in RETRYABLE_STATUSES
+    return isinstance(error, RETRYABLE_EXCEPTIONS)
+
+
+def describe_error(error: BaseException) -> str:
+    """Short label for logs, e.g. 'HTTP 503 backendError' or 'ConnectionResetError'"""
+    if isinstance(error, HttpError):
+        return f"HTTP {error.resp.status} {get_error_reason(error) or ''}".strip()
+    return type(error).__name__
+
+
+class RetryPolicy:
+    """Retries transient API errors with exponential backoff and full jitter.
+
+    An attempt is retried until `max_attempts` is reached or the next wait would go past
+    the per-request `deadline` (seconds); the last error is then raised. Retry counts
+    are kept per endpoint. `sleep`, `clock` and `rng` can be replaced to test without waiting.
+    """
+
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, deadline: Optional[float] = None,
+                 sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.monotonic,
+                 rng: Callable[[], float] = random.random):
+        self.max_attempts = max_attempts if max_attempts is not None else config.API_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else config.API_RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else config.API_RETRY_MAX_DELAY
+        self.deadline = deadline if deadline is not None else config.API_REQUEST_DEADLINE
+        self.sleep = sleep
+        self.clock = clock
+        self.rng = rng
+        self.retries = Counter()
+        self.failures = Counter()
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """Wait before retry number `attempt` (1-based): uniform in [0, min(max_delay, base * 2^(attempt-1))]"""
+        return self.rng() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def execute(self, send: Callable, request):
+        """Send `request` with `send` (e.g. the quota scheduler), retrying transient errors"""
+        endpoint = (getattr(request, "methodId", "") or "").split(".", 1)[-1]
+        start = self.clock()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return send(request)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                if attempt >= self.max_attempts or self.clock() - start + delay > self.deadline:
+                    with self._lock:
+                        self.failures[endpoint] += 1
+                    logger.error(f"Giving up on {endpoint} after {attempt} attempts: {describe_error(e)}")
+                    raise
+                with self._lock:
+                    self.retries[endpoint] += 1
+                logger.warning(f"{endpoint} failed ({describe_error(e)}), retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+                self.sleep(delay)
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.retries and not self.failures:
+                return "no retries"
+            per_endpoint = ", ".join(f"{name}: {count}" for name, count in sorted(self.retries.items()))
+            retries = f"{sum(self.retries.values())} retries" + (f" ({per_endpoint})" if per_endpoint else "")
+            return f"{retries}, {sum(self.failures.values())} requests given up"
+
+
+_default_policy = None
+_default_policy_lock = threading.Lock()
+
+
+def get_default_retry_policy() -> RetryPolicy:
+    """Retry policy shared by every YouTubeAPIService of the process"""
+    global _default_policy
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = RetryPolicy()
+        return _default_policy
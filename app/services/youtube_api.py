@@ -1,14 +1,31 @@
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from config import config
-from typing import List, Dict, Optional
+import httplib2
+from app.services.channel_id_cache import get_default_channel_id_cache
+from app.services.quota import QuotaScheduler, QuotaExceededError, get_default_scheduler
+from app.services.response_cache import get_default_response_cache, is_not_modified
+from app.services.retry import RetryPolicy, get_default_retry_policy
+from datetime import timedelta
+from typing import Iterator, List, Dict, Optional, Set
 import logging
+import queue
+import threading
 
 logger = logging.getLogger(__name__)
 
 class YouTubeAPIService:
-    def __init__(self):
-        self.service = self.get_youtube_service()
+    def __init__(self, scheduler: Optional[QuotaScheduler] = None, retry_policy: Optional[RetryPolicy] = None,
+                 service=None):
+        # `service` replaces the googleapiclient resource, e.g. with a local stub of the API
+        self._owns_service = service is None
+        self.service = service if service is not None else self.get_youtube_service()
+        self._playlist_service = None
+        # All instances share the process-wide quota budget, retry counters and ETag cache unless told otherwise
+        self.scheduler = scheduler or get_default_scheduler()
+        self.retry_policy = retry_policy or get_default_retry_policy()
+        self.response_cache = get_default_response_cache() if config.ETAG_CACHE_ENABLED else None
+        self.channel_id_cache = get_default_channel_id_cache()
 
     def get_youtube_service(self):
         try :
@@ -16,51 +33,84 @@ class YouTubeAPIService:
                 config.YOUTUBE_API_SERVICE_NAME,
                 config.YOUTUBE_API_VERSION,
                 developerKey=config.YOUTUBE_API_KEY,
+                http=httplib2.Http(timeout=config.API_SOCKET_TIMEOUT),
             )
         except Exception as e:
             logger.error(f"Error when creating youtube service : {e}")
             raise
 
+    def execute(self, request, conditional: bool = False):
+        """Run an API request through the quota scheduler. Every call must go through here.
+
+        Transient errors are retried by the retry policy, each attempt being charged.
+        Conditional requests go through the ETag cache: unchanged responses come back
+        from the cache flagged with NOT_MODIFIED_KEY.
+        """
+        if conditional and self.response_cache is not None:
+            return self.response_cache.execute(request, self._send)
+        return self._send(request)
+
+    def _send(self, request):
+        return self.retry_policy.execute(self.scheduler.execute, request)
+
     def resolve_channel_identifier(self, channel_identifier: str) -> Optional[str]:
+        """Resolve a channels.txt identifier to a channel ID, going through the shared cache first"""
+        if channel_identifier.startswith('UC'):
+            return channel_identifier
 
-        try:
-            if channel_identifier.startswith('UC'):
-                return channel_identifier
+        max_age = timedelta(days=config.CHANNEL_ID_CACHE_TTL_DAYS)
+        channel_id = self.channel_id_cache.get(channel_identifier, max_age)
+        if channel_id:
+            return channel_id
+
+        channel_id = self.lookup_channel_identifier(channel_identifier)
+        if channel_id:
+            self.channel_id_cache.put(channel_identifier, channel_id)
+        return channel_id
 
+    def lookup_channel_identifier(self, channel_identifier: str) -> Optional[str]:
+        """Resolve an identifier with the API (forHandle, forUsername, then search as a last resort)"""
+        try:
             if channel_identifier.startswith("@"):
                 handle = channel_identifier[1:]
                 try:
-                    handle_response = self.service.channels().list(
+                    handle_response = self.execute(self.service.channels().list(
                         part="id",
                         forHandle=handle  # new in API 2022
-                    ).execute()
+                    ))
 
                     if handle_response['items']:
                         return handle_response['items'][0]['id']
                     
+                except QuotaExceededError:
+                    raise
                 except Exception as handle_exc:
                     logger.warning(f"Handle lookup failed: {handle_exc}")
 
             try:
-                channels_response = self.service.channels().list(
+                channels_response = self.execute(self.service.channels().list(
                     part="id",
                     forUsername=channel_identifier
-                ).execute()
+                ))
                 if channels_response['items']:
                     return channels_response['items'][0]['id']
+            except QuotaExceededError:
+                raise
             except Exception as username_exc:
                 logger.warning(f"Username lookup failed: {username_exc}")
 
             # Last resort: search for channel by name (caution: high quota usage!)
             try:
-                search_response = self.service.search().list(
+                search_response = self.execute(self.service.search().list(
                     part="snippet",
                     q=channel_identifier,
                     type="channel",
                     maxResults=1
-                ).execute()
+                ))
                 if search_response['items']:
                     return search_response['items'][0]['snippet']['channelId']
+            except QuotaExceededError:
+                raise
             except Exception as search_exc:
                 logger.warning(f"Channel search lookup failed: {search_exc}")
 
@@ -73,7 +123,8 @@ class YouTubeAPIService:
 
         
 
-    def get_channel_info(self, channel_identifier: str) -> Optional[Dict]:
+    def get_channel_info(self, channel_identifier: str, include_snippet: bool = True) -> Optional[Dict]:
+        """Fetch channel statistics, plus the snippet (title, description) unless include_snippet is False"""
         try:
             channel_id = self.resolve_channel_identifier(channel_identifier)
             if not channel_id:
@@ -84,86 +135,201 @@ class YouTubeAPIService:
 
 
 
-            channel_response = self.service.channels().list(
-                part="snippet,statistics",
+            channel_response = self.execute(self.service.channels().list(
+                part="snippet,statistics" if include_snippet else "statistics",
                 id=channel_id
-            ).execute()
+            ), conditional=True)
             
             if channel_response['items']:
                 channel_info = channel_response['items'][0]
-                logger.info(f"Channel found: {channel_info['snippet']['title']}")
+                channel_name = channel_info.get('snippet', {}).get('title', channel_id)
+                if is_not_modified(channel_info):
+                    logger.info(f"Channel unchanged since last fetch: {channel_name}")
+                else:
+                    logger.info(f"Channel found: {channel_name}")
                 return channel_info
             
+            # A cached resolution may point to a channel that no longer exists
+            if channel_id != channel_identifier:
+                self.channel_id_cache.invalidate(channel_identifier)
             return None
             
         except HttpError as e:
-            logger.error(f"Youtube API error for channel {channel_id}: {e}")
-            return None
-        
-        except Exception as e:
-            logger.error("Unexpected Error")
+            # Other failures (5xx after retries, 403...) propagate so the run ledger records them
+            if e.resp.status != 404:
+                raise
+            logger.warning(f"Channel not found: {channel_identifier}")
             return None
         
-    def get_channel_videos(self, channel_identifier: str, max_results: int = None) -> List[Dict]:
+    def get_channel_videos(self, channel_identifier: str, max_results: int = None, known_video_ids: Optional[Set[str]] = None,
+                           snippet_video_ids: Optional[Set[str]] = None, stop_at_known: bool = True) -> List[Dict]:
+        """Fetch details for the channel's uploads, newest first, as one list (see iter_channel_video_pages)"""
+        return [
+            video
+            for page in self.iter_channel_video_pages(channel_identifier, max_results, known_video_ids, snippet_video_ids,
+                                                      stop_at_known)
+            for video in page
+        ]
+
+    def iter_channel_video_pages(self, channel_identifier: str, max_results: int = None,
+                                 known_video_ids: Optional[Set[str]] = None,
+                                 snippet_video_ids: Optional[Set[str]] = None,
+                                 stop_at_known: bool = True) -> Iterator[List[Dict]]:
+        """Fetch details for the channel's uploads, newest first, yielding one page (<= 50 videos) at a time.
+
+        With `known_video_ids` (incremental mode), pagination stops at the first page
+        that contains an already stored video, since the uploads playlist is ordered
+        newest first, unless `stop_at_known` is False (older pages may be missing after
+        an interrupted walk). Known videos are then refreshed with batched videos().list
+        calls: statistics only, except for those in `snippet_video_ids` (all of them if
+        None). New videos always come with their snippet.
+
+        Playlist pages are fetched up to config.PLAYLIST_PREFETCH_PAGES ahead, in a
+        background thread, while the details of the previous pages are being fetched.
+
+        Errors that persist after retries are raised rather than silently truncating the pages.
+        """
         if max_results is None:
             max_results = config.MAX_TOTAL_VIDEOS
+        known_video_ids = known_video_ids or set()
 
         channel_id = self.resolve_channel_identifier(channel_identifier)
         if not channel_id:
             logger.error(f"Cannot find channel ID for identifier: {channel_identifier}")
-            return []
+            return
 
         # --- New method: playlist uploads ---
         uploads_playlist_id = 'UU' + channel_id[2:]
 
-        videos = []
+        new_count = 0
+        pages = self.iter_playlist_pages(uploads_playlist_id, max_results, known_video_ids, stop_at_known)
+        if config.PLAYLIST_PREFETCH_PAGES > 0:
+            pages = self._prefetch(pages, config.PLAYLIST_PREFETCH_PAGES)
+        for new_video_ids in pages:
+            for page in self.iter_video_batches(new_video_ids, part="snippet,statistics"):
+                new_count += len(page)
+                yield page
+            logger.info(f"Retrieved {new_count} until now...")
+
+        if known_video_ids:
+            logger.info(f"Found {new_count} new videos, refreshing {len(known_video_ids)} known videos")
+            if snippet_video_ids is None:
+                snippet_video_ids = known_video_ids
+            yield from self.iter_video_batches(sorted(known_video_ids & snippet_video_ids), part="snippet,statistics")
+            yield from self.iter_video_batches(sorted(known_video_ids - snippet_video_ids), part="statistics")
+
+    def iter_playlist_pages(self, playlist_id: str, max_results: int, known_video_ids: Set[str],
+                            stop_at_known: bool = True) -> Iterator[List[str]]:
+        """Page through an uploads playlist, yielding the IDs of the videos not in `known_video_ids`, page by page.
+
+        Stops after `max_results` new videos, or with `stop_at_known` after the first page
+        that contains a known video (the playlist is ordered newest first).
+        """
+        new_count = 0
         next_page_token = None
+        while new_count < max_results:
+            playlist_request = self.playlist_service.playlistItems().list(
+                part="contentDetails",
+                playlistId=playlist_id,
+                maxResults=min(50, max_results - new_count),  # 50 max per page
+                pageToken=next_page_token,
+            )
+            try:
+                playlist_response = self.execute(playlist_request)
+            except HttpError as e:
+                # Channels without any upload have no uploads playlist
+                if e.resp.status != 404:
+                    raise
+                logger.warning(f"No uploads playlist {playlist_id}")
+                return
 
-        try:
-            while len(videos) < max_results:
-                playlist_request = self.service.playlistItems().list(
-                    part="contentDetails",
-                    playlistId=uploads_playlist_id,
-                    maxResults=min(50, max_results - len(videos)),  # 50 max per page
-                    pageToken=next_page_token,
-                )
-                playlist_response = playlist_request.execute()
-
-                if not playlist_response['items']:
-                    break
-
-                # Get the videoIds
-                video_ids = [item['contentDetails']['videoId'] for item in playlist_response['items']]
-                video_details = self.get_video_details(video_ids)
-                videos.extend(video_details)
-                logger.info(f"Retrieved {len(videos)} until now...")
-
-                # Pagination
-                next_page_token = playlist_response.get('nextPageToken')
-                if not next_page_token:
-                    break
+            if not playlist_response['items']:
+                return
 
-        except HttpError as e:
-            logger.error(f"Error while requesting videos: {e}")
+            # Get the videoIds
+            video_ids = [item['contentDetails']['videoId'] for item in playlist_response['items']]
+            new_video_ids = [video_id for video_id in video_ids if video_id not in known_video_ids]
+            new_count += len(new_video_ids)
+            if new_video_ids:
+                yield new_video_ids
 
-        logger.info(f"Retrieved videos in total: {len(videos)}")
-        return videos
+            # Incremental mode: everything past this page is already stored
+            if stop_at_known and len(new_video_ids) < len(video_ids):
+                return
 
-    
-    def get_video_details(self, video_ids: List[str]) -> List[dict]:
-        results = []
+            # Pagination
+            next_page_token = playlist_response.get('nextPageToken')
+            if not next_page_token:
+                return
+
+    @property
+    def playlist_service(self):
+        """Client used for playlist paging, which may run in its own thread (see _prefetch).
+
+        googleapiclient clients are not thread-safe, so a built client gets a second one;
+        an injected service (e.g. a local stub) is shared.
+        """
+        if self._playlist_service is None:
+            self._playlist_service = self.get_youtube_service() if self._owns_service else self.service
+        return self._playlist_service
+
+    def _prefetch(self, items: Iterator, max_ahead: int) -> Iterator:
+        """Run `items` in a background thread, at most `max_ahead` items ahead of the consumer.
+
+        Used to page through a playlist while the previous page's video details are
+        being fetched. Errors raised by the producer are re-raised to the consumer.
+        """
+        buffer = queue.Queue(maxsize=max_ahead)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for item in items:
+                    if not put((item, None)):
+                        return
+                put((done, None))
+            except BaseException as e:
+                put((done, e))
+
+        producer = threading.Thread(target=produce, name=f"{threading.current_thread().name}-pager", daemon=True)
+        producer.start()
         try:
-            # Process in batches of 50 (max allowed by the API)
-            for i in range(0, len(video_ids), 50):
-                batch_ids = video_ids[i:i+50]
-                request = self.service.videos().list(
-                    part="snippet,statistics",
-                    id=','.join(batch_ids)
-                )
-                response = request.execute()
-                results.extend(response.get('items', []))
+            while True:
+                item, error = buffer.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    return
+                yield item
+        finally:
+            # The consumer may stop early (error, writer gone): release the producer
+            stop.set()
+            producer.join()
 
-        except HttpError as e:
-            logger.error(f"Error while requesting video details: {e}")
-            
-        return results
+    def iter_video_batches(self, video_ids: List[str], part: str) -> Iterator[List[dict]]:
+        """Yield videos().list items batch by batch (50 IDs per call, the API maximum)"""
+        for i in range(0, len(video_ids), 50):
+            batch_ids = video_ids[i:i+50]
+            request = self.service.videos().list(
+                part=part,
+                id=','.join(batch_ids)
+            )
+            response = self.execute(request, conditional=True)
+            yield response.get('items', [])
+
+    def get_video_statistics(self, video_ids: List[str]) -> List[dict]:
+        """Fetch only the statistics part for known videos (items carry `id` and `statistics`)"""
+        return [video for batch in self.iter_video_batches(video_ids, part="statistics") for video in batch]
+
+    def get_video_details(self, video_ids: List[str]) -> List[dict]:
+        return [video for batch in self.iter_video_batches(video_ids, part="snippet,statistics") for video in batch]
@@ -0,0 +1,107 @@
+"""Micro-benchmark of the legacy history helpers over 10-year daily histories.
+
+Columns: the previous linear implementations on JSON text, the current helpers on JSON
+text (add_history_point converts it to a blob on the way), and the current helpers on a blob.
+
+Run from the repository root: python benchmarks/bench_history.py
+"""
+import json
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("YOUTUBE_API_KEY", "benchmark")  # config.py requires one; no API call is made
+
+from app.data.history_codec import encode_history
+from app.data.storage import (
+    add_history_point, get_history_for_date_range, get_latest_history_point, parse_history_json,
+    serialize_history_json
+)
+
+YEARS = 10
+
+
+def make_history(days: int):
+    start = date(2015, 1, 1)
+    return [{"date": (start + timedelta(days=i)).isoformat(), "count": 1000 + 37 * i} for i in range(days)]
+
+
+# Previous implementations (linear scan + re-sort, full scans), kept as the baseline
+def linear_add_history_point(current_history_str, new_count, date_str):
+    history = parse_history_json(current_history_str)
+    for point in history:
+        if point.get("date") == date_str:
+            point["count"] = new_count
+            return serialize_history_json(history)
+    history.append({"date": date_str, "count": new_count})
+    history.sort(key=lambda x: x["date"])
+    return serialize_history_json(history)
+
+
+def linear_get_history_for_date_range(history_str, start_date, end_date):
+    return [
+        point for point in parse_history_json(history_str)
+        if point.get("date") and start_date <= point["date"] <= end_date
+    ]
+
+
+def linear_get_latest_history_point(history_str):
+    history = parse_history_json(history_str)
+    return max(history, key=lambda x: x.get("date", "")) if history else None
+
+
+def timed(func, number: int) -> float:
+    """Mean seconds per call over `number` calls (best of 3 repeats)"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def run(number: int = 200):
+    history = make_history(365 * YEARS)
+    history_json = json.dumps(history)
+    history_blob = encode_history([p["date"] for p in history], [p["count"] for p in history])
+    last_date = date.fromisoformat(history[-1]["date"])
+    next_day = (last_date + timedelta(days=1)).isoformat()
+    middle_day = history[len(history) // 2]["date"]
+    range_args = ((last_date - timedelta(days=90)).isoformat(), last_date.isoformat())
+
+    cases = {
+        "add_history_point (append next day)": (
+            lambda: linear_add_history_point(history_json, 1, next_day),
+            lambda: add_history_point(history_json, 1, next_day),
+            lambda: add_history_point(history_blob, 1, next_day),
+        ),
+        "add_history_point (update middle day)": (
+            lambda: linear_add_history_point(history_json, 1, middle_day),
+            lambda: add_history_point(history_json, 1, middle_day),
+            lambda: add_history_point(history_blob, 1, middle_day),
+        ),
+        "get_history_for_date_range (last 90 days)": (
+            lambda: linear_get_history_for_date_range(history_json, *range_args),
+            lambda: get_history_for_date_range(history_json, *range_args),
+            lambda: get_history_for_date_range(history_blob, *range_args),
+        ),
+        "get_latest_history_point": (
+            lambda: linear_get_latest_history_point(history_json),
+            lambda: get_latest_history_point(history_json),
+            lambda: get_latest_history_point(history_blob),
+        ),
+    }
+
+    results = {}
+    for name, (baseline, json_impl, blob_impl) in cases.items():
+        results[name] = {
+            "linear_json_us": timed(baseline, number) * 1e6,
+            "json_in_us": timed(json_impl, number) * 1e6,
+            "blob_in_us": timed(blob_impl, number) * 1e6,
+        }
+    return {"points": len(history), "json_bytes": len(history_json), "blob_bytes": len(history_blob), "cases": results}
+
+
+if __name__ == "__main__":
+    report = run()
+    print(f"{report['points']} points: JSON {report['json_bytes']} bytes, blob {report['blob_bytes']} bytes")
+    print(f"{'case':<45}{'linear JSON':>12}{'JSON in':>12}{'blob in':>12}  (us per call)")
+    for name, timings in report["cases"].items():
+        print(f"{name:<45}{timings['linear_json_us']:>12.0f}{timings['json_in_us']:>12.0f}{timings['blob_in_us']:>12.0f}")
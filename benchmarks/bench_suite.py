@@ -0,0 +1,359 @@
+"""Benchmark suite for the ingestion and storage hot paths, against a local fake of the YouTube API.
+
+Builds a throwaway database of `--channels` x `--videos` x `--history-days`, then times:
+  - ingest: a full update_channels_data run, an incremental one, and refresh_video_stats
+  - writes: save_videos / save_video_statistics latency per video (insert, unchanged, changed)
+  - reads: every storage read helper used by the dashboard
+  - history_helpers: the legacy history helpers (see bench_history.py)
+
+Results are written to JSON; `--compare` prints the change against an earlier result file.
+Run from the repository root:
+
+    python benchmarks/bench_suite.py --channels 5 --videos 500 --history-days 90 --latency 0.01
+    python benchmarks/bench_suite.py --compare benchmarks/results/<commit>.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.environ.setdefault("YOUTUBE_API_KEY", "benchmark")  # config.py requires one; no API call is made
+
+from sqlalchemy import func, insert
+
+import main
+from app.analytics import TIER_GOLD
+from app.data import storage
+from app.services.quota import QuotaScheduler
+from app.services.retry import RetryPolicy
+from app.services.youtube_api import YouTubeAPIService
+from config import config
+from fake_api import FakeYouTubeService, channel_id_for, video_id_for, video_item
+import bench_history
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+SNAPSHOT_CHUNK = 20_000
+
+
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def latency_stats(samples: list) -> dict:
+    """Summary of per-call durations (seconds), reported in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "calls": len(ordered),
+        "min_ms": ordered[0] * 1e3,
+        "median_ms": statistics.median(ordered) * 1e3,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1e3,
+    }
+
+
+def time_calls(func, repeat: int) -> dict:
+    func()  # warm-up: first call pays for statement compilation and a cold page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return latency_stats(samples)
+
+
+def count_rows(model) -> int:
+    sess = storage.Session()
+    try:
+        return sess.query(func.count()).select_from(model).scalar()
+    finally:
+        sess.close()
+
+
+def use_fake_api(service: FakeYouTubeService):
+    """Route main.py's API clients to the fake, with an unlimited quota and no retry waits"""
+    scheduler = QuotaScheduler(daily_budget=10 ** 12)
+    retry_policy = RetryPolicy(sleep=lambda delay: None)
+    main.get_default_scheduler = lambda: scheduler
+    main.get_worker_service = lambda: YouTubeAPIService(scheduler=scheduler, retry_policy=retry_policy, service=service)
+    main.read_channels_from_file = lambda file_path="channels.txt": list(service.channel_ids)
+
+
+def timed_stage(service: FakeYouTubeService, run) -> dict:
+    calls_before = service.call_counts()
+    videos_before = count_rows(storage.Video)
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    calls = {method: count - calls_before.get(method, 0) for method, count in service.call_counts().items()}
+    return {
+        "seconds": elapsed,
+        "new_videos": count_rows(storage.Video) - videos_before,
+        "api_calls": {method: count for method, count in calls.items() if count},
+    }
+
+
+def bench_ingest(service: FakeYouTubeService, workers: int, write_batch_size: int) -> dict:
+    """Full first run, then the daily routine: an incremental run with new uploads, and a statistics refresh"""
+    use_fake_api(service)
+    total_videos = len(service.channel_ids) * service.videos_per_channel
+    results = {}
+
+    full = timed_stage(service, lambda: main.update_channels_data(
+        max_workers=workers, incremental=False, write_batch_size=write_batch_size))
+    full["videos_per_s"] = total_videos / full["seconds"]
+    results["full_update"] = full
+
+    service.advance(new_videos=max(1, service.videos_per_channel // 100))
+    incremental = timed_stage(service, lambda: main.update_channels_data(
+        max_workers=workers, incremental=True, write_batch_size=write_batch_size))
+    incremental["videos_per_s"] = count_rows(storage.Video) / incremental["seconds"]
+    results["incremental_update"] = incremental
+
+    service.advance()
+    refresh = timed_stage(service, lambda: main.refresh_video_stats(max_workers=workers))
+    refresh["videos_per_s"] = count_rows(storage.Video) / refresh["seconds"]
+    results["refresh_video_stats"] = refresh
+    return results
+
+
+def bench_writes(channel_index: int, videos: int, batch_size: int) -> dict:
+    """Write latency per video on a channel outside the fake API's range, batch by batch"""
+    channel_id = channel_id_for(channel_index)
+    storage.save_channel_info({
+        "id": channel_id,
+        "snippet": {"title": "Write benchmark", "description": ""},
+        "statistics": {"subscriberCount": "1", "viewCount": "1", "videoCount": str(videos)},
+    })
+    batches = [list(range(i, min(i + batch_size, videos))) for i in range(0, videos, batch_size)]
+
+    def run(write, tick, part="snippet,statistics"):
+        samples = []
+        for batch in batches:
+            items = [video_item(video_id_for(channel_index, i), part, tick) for i in batch]
+            start = time.perf_counter()
+            write(items)
+            samples.append((time.perf_counter() - start) / len(items))
+        stats = latency_stats(samples)
+        return {"per_video_us": sum(samples) / len(samples) * 1e6, "batch_size": batch_size,
+                "batches": len(batches), "per_video_median_us": stats["median_ms"] * 1e3,
+                "per_video_p95_us": stats["p95_ms"] * 1e3}
+
+    save = lambda items: storage.save_videos(channel_id, items)
+    return {
+        "save_videos_insert": run(save, tick=0),
+        "save_videos_unchanged": run(save, tick=0),
+        "save_videos_changed": run(save, tick=1),
+        "save_video_statistics_changed": run(storage.save_video_statistics, tick=2, part="statistics"),
+    }
+
+
+def generate_history(days: int) -> dict:
+    """Backfill `days` of daily snapshots before today for every channel and video (bulk inserts)"""
+    today = date.today()
+    start = time.perf_counter()
+    sess = storage.Session()
+    try:
+        channels = sess.query(storage.Channel.id, storage.Channel.subscribers, storage.Channel.view_count).all()
+        videos = sess.query(storage.Video.id, storage.Video.view_count, storage.Video.like_count,
+                            storage.Video.comment_count).all()
+        sess.execute(insert(storage.ChannelStatsSnapshot), [
+            {"channel_id": channel_id, "date": today - timedelta(days=day),
+             "subscribers": max(0, subscribers - 25 * day), "views": max(0, views - 5_000 * day)}
+            for channel_id, subscribers, views in channels for day in range(1, days + 1)
+        ])
+        rows = []
+        for video_id, views, likes, comments in videos:
+            for day in range(1, days + 1):
+                rows.append({"video_id": video_id, "date": today - timedelta(days=day),
+                             "views": max(0, views - 10 * day), "likes": likes, "comments": comments})
+            if len(rows) >= SNAPSHOT_CHUNK:
+                sess.execute(insert(storage.VideoStatsSnapshot), rows)
+                rows = []
+        if rows:
+            sess.execute(insert(storage.VideoStatsSnapshot), rows)
+        sess.commit()
+    except Exception:
+        sess.rollback()
+        raise
+    finally:
+        sess.close()
+    elapsed = time.perf_counter() - start
+    snapshots = len(channels) * days + len(videos) * days
+    return {"days": days, "snapshot_rows": snapshots, "seconds": elapsed, "rows_per_s": snapshots / elapsed}
+
+
+def bench_reads(channel_id: str, video_id: str, repeat: int) -> dict:
+    """Latency of each read helper, as called by the dashboard"""
+    channel_ids = [row["id"] for row in storage.get_channels_data()]
+    since = (date.today() - timedelta(days=30)).isoformat()
+    cases = {
+        "get_data_version": lambda: storage.get_data_version(),
+        "get_channels_data": lambda: storage.get_channels_data(),
+        "get_channel_data": lambda: storage.get_channel_data(channel_id),
+        "get_channels_last_fetched": lambda: storage.get_channels_last_fetched(channel_ids),
+        "get_channel_video_publication_dates": lambda: storage.get_channel_video_publication_dates(channel_id),
+        "query_videos_page (published_at)": lambda: storage.query_videos_page(channel_id),
+        "query_videos_page (engagement, page 5)": lambda: storage.query_videos_page(channel_id, sort_by="engagement", page=5),
+        "query_videos_page (tier + views filter)": lambda: storage.query_videos_page(
+            channel_id, tiers=[TIER_GOLD], min_views=10_000, sort_by="views_per_day"),
+        "query_top_videos": lambda: storage.query_top_videos(),
+        "get_video_data": lambda: storage.get_video_data(video_id),
+        "get_channel_history_arrays": lambda: storage.get_channel_history_arrays(channel_id),
+        "get_channel_subscriber_history": lambda: storage.get_channel_subscriber_history(channel_id),
+        "get_channel_view_history (last 30 days)": lambda: storage.get_channel_view_history(channel_id, start_date=since),
+        "get_video_view_history_arrays": lambda: storage.get_video_view_history_arrays(video_id),
+        "get_video_view_history": lambda: storage.get_video_view_history(video_id),
+        "get_known_video_ids": lambda: storage.get_known_video_ids(channel_id),
+        "get_tracked_video_ids": lambda: storage.get_tracked_video_ids(),
+    }
+    return {name: time_calls(case, repeat) for name, case in cases.items()}
+
+
+def run(channels: int = 5, videos: int = 500, history_days: int = 90, latency: float = 0.01,
+        workers: int = None, write_batch_size: int = None, read_repeat: int = 50, history_number: int = 50,
+        etag: bool = False, database_dir: str = None) -> dict:
+    workers = workers or config.MAX_WORKERS
+    write_batch_size = write_batch_size or config.WRITE_BATCH_SIZE
+    config.EXPORT_AFTER_UPDATE = False
+    config.ETAG_CACHE_ENABLED = etag
+    params = {
+        "channels": channels, "videos_per_channel": videos, "history_days": history_days, "latency_s": latency,
+        "workers": workers, "write_batch_size": write_batch_size, "read_repeat": read_repeat, "etag_cache": etag,
+    }
+
+    with tempfile.TemporaryDirectory(dir=database_dir) as tmp_dir:
+        database_path = os.path.join(tmp_dir, "benchmark.db")
+        storage.configure_database(database_path)
+        storage.init_db()
+
+        service = FakeYouTubeService(channels=channels, videos_per_channel=videos, latency=latency)
+        logger.info(f"Ingesting {channels} channels x {videos} videos ({latency * 1e3:.0f} ms per API call)")
+        ingest = bench_ingest(service, workers, write_batch_size)
+        logger.info(f"Generating {history_days} days of history")
+        history = generate_history(history_days)
+        logger.info("Timing writes")
+        writes = bench_writes(channels, videos, write_batch_size)
+        logger.info("Timing reads")
+        channel_id = service.channel_ids[0]
+        reads = bench_reads(channel_id, video_id_for(0, videos // 2), read_repeat)
+        database_bytes = os.path.getsize(database_path)
+        storage.engine.dispose()
+
+    logger.info("Timing the history helpers")
+    return {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "params": params,
+        "database": {**history, "bytes": database_bytes},
+        "ingest": ingest,
+        "writes": writes,
+        "reads": reads,
+        "history_helpers": bench_history.run(number=history_number),
+    }
+
+
+# Timing leaves compared by --compare (lower is better for all but the throughput ones).
+# Medians and means only: min and p95 of short runs are too noisy to flag regressions on.
+HIGHER_IS_BETTER = ("videos_per_s", "rows_per_s")
+COMPARED_SUFFIXES = ("seconds", "median_ms", "per_video_us", "json_in_us", "blob_in_us") + HIGHER_IS_BETTER
+
+
+def flatten(report: dict, prefix: str = "") -> dict:
+    values = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and name.endswith(COMPARED_SUFFIXES):
+            values[name] = value
+    return values
+
+
+def compare(baseline: dict, report: dict, threshold: float = 0.20) -> list:
+    """Rows (metric, baseline, current, change) for the timings present in both reports"""
+    before, after = flatten(baseline), flatten(report)
+    rows = []
+    for name in sorted(before.keys() & after.keys()):
+        if not before[name]:
+            continue
+        change = after[name] / before[name] - 1
+        slower = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = "REGRESSION" if slower > threshold else ("improved" if slower < -threshold else "")
+        rows.append((name, before[name], after[name], change, flag))
+    return rows
+
+
+def print_report(report: dict):
+    print(f"Commit {report['meta']['commit']}{' (dirty)' if report['meta']['dirty'] else ''}: {report['params']}")
+    for stage, values in report["ingest"].items():
+        print(f"  {stage:<40}{values['seconds']:>10.2f} s {values['videos_per_s']:>10.0f} videos/s")
+    for name, values in report["writes"].items():
+        print(f"  {name:<40}{values['per_video_us']:>10.0f} us/video")
+    for name, values in report["reads"].items():
+        print(f"  {name:<40}{values['median_ms']:>10.2f} ms (p95 {values['p95_ms']:.2f})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and storage against a fake YouTube API")
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--videos", type=int, default=500, help="Videos per channel")
+    parser.add_argument("--history-days", type=int, default=90, help="Days of snapshots per channel and video")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds per fake API call")
+    parser.add_argument("--workers", type=int, default=None, help="Fetch workers (config.MAX_WORKERS by default)")
+    parser.add_argument("--write-batch-size", type=int, default=None, help="config.WRITE_BATCH_SIZE by default")
+    parser.add_argument("--read-repeat", type=int, default=50, help="Timed calls per read helper")
+    parser.add_argument("--etag", action="store_true", help="Go through the ETag response cache")
+    parser.add_argument("--database-dir", default=None, help="Where to create the throwaway database (system temp by default)")
+    parser.add_argument("--output", default=None, help="JSON result file (benchmarks/results/<commit>.json by default)")
+    parser.add_argument("--compare", default=None, help="Earlier JSON result to compare with")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Relative change reported as a regression")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.getLogger().setLevel(logging.WARNING)  # main.py logs every channel at INFO
+    logger.setLevel(logging.INFO)
+
+    baseline = None
+    if args.compare:  # read first: the new result may overwrite the same file
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run(
+        channels=args.channels, videos=args.videos, history_days=args.history_days, latency=args.latency,
+        workers=args.workers, write_batch_size=args.write_batch_size, read_repeat=args.read_repeat,
+        etag=args.etag, database_dir=args.database_dir,
+    )
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"Results written to {output}")
+
+    if baseline is not None:
+        if baseline.get("params") != report["params"]:
+            print(f"Warning: parameters differ from {args.compare}: {baseline.get('params')}")
+        print(f"Compared with {baseline['meta'].get('commit')} (change > {args.threshold:.0%} flagged)")
+        for name, before, after, change, flag in compare(baseline, report, args.threshold):
+            print(f"  {name:<75}{before:>12.3f}{after:>12.3f}{change:>+9.1%}  {flag}")
@@ -0,0 +1,165 @@
+"""Local stand-in for the googleapiclient YouTube service, for benchmarks.
+
+Serves synthetic channels, uploads playlist pages and video statistics with a
+configurable latency per request, so the ingestion pipeline can be timed without
+network or quota. Only the calls made by YouTubeAPIService are implemented.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+FIRST_UPLOAD = datetime(2015, 1, 1)
+
+
+def http_error(status: int, reason: str) -> HttpError:
+    """HttpError shaped like the API's, e.g. http_error(403, "quotaExceeded")"""
+    body = json.dumps({"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), body, uri="https://fake.googleapis.com")
+
+
+def channel_id_for(index: int) -> str:
+    return f"UC{index:022d}"
+
+
+def video_id_for(channel_index: int, index: int) -> str:
+    return f"v{channel_index:04d}x{index:06d}"
+
+
+def video_item(video_id: str, part: str = "snippet,statistics", tick: int = 0) -> Dict:
+    """One videos().list item; statistics grow with `tick`"""
+    channel_index, index = (int(value) for value in video_id[1:].split("x"))
+    views = 1_000 + (index * 7_919 + channel_index * 104_729) % 250_000 + tick * (10 + index % 50)
+    likes = views // (20 + index % 30)
+    item = {"id": video_id, "statistics": {
+        "viewCount": str(views), "likeCount": str(likes), "commentCount": str(likes // 10),
+    }}
+    if "snippet" in part:
+        published_at = FIRST_UPLOAD + timedelta(hours=12 * index)
+        item["snippet"] = {
+            "title": f"Video {index} of channel {channel_index}",
+            "description": f"Synthetic description of video {index}. " * 50,
+            "publishedAt": published_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+    return item
+
+
+class FakeRequest:
+    """What `service.<resource>().list(...)` returns: executed later by the quota scheduler"""
+
+    def __init__(self, service: "FakeYouTubeService", method: str, params: Dict):
+        self.service = service
+        self.methodId = f"youtube.{method}"
+        self.params = params
+        self.uri = f"https://fake.googleapis.com/youtube/v3/{method}?" + "&".join(
+            f"{key}={value}" for key, value in sorted(params.items()) if value is not None
+        )
+        self.headers = {}
+
+    def execute(self):
+        return self.service.handle(self.methodId.split(".", 1)[1], self.params, self.headers)
+
+
+class FakeResource:
+    def __init__(self, service: "FakeYouTubeService", name: str):
+        self.service = service
+        self.name = name
+
+    def list(self, **params) -> FakeRequest:
+        return FakeRequest(self.service, f"{self.name}.list", params)
+
+
+class FakeYouTubeService:
+    """Synthetic YouTube Data API v3 with `channels` channels of `videos_per_channel` uploads each.
+
+    Every request sleeps `latency` seconds (outside the lock, so concurrent workers overlap).
+    Responses carry an ETag that changes with `advance()`, and a request sent with a
+    matching If-None-Match gets a 304, like the real API. `faults` maps a method
+    ("videos.list") to [count, error]: the next `count` calls raise `error`.
+    """
+
+    def __init__(self, channels: int = 5, videos_per_channel: int = 500, latency: float = 0.0,
+                 faults: Optional[Dict[str, list]] = None):
+        self.channel_ids = [channel_id_for(i) for i in range(channels)]
+        self._channel_indexes = {channel_id: i for i, channel_id in enumerate(self.channel_ids)}
+        self.videos_per_channel = videos_per_channel
+        self.latency = latency
+        self.faults = faults or {}
+        self.tick = 0
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def channels(self) -> FakeResource:
+        return FakeResource(self, "channels")
+
+    def playlistItems(self) -> FakeResource:
+        return FakeResource(self, "playlistItems")
+
+    def videos(self) -> FakeResource:
+        return FakeResource(self, "videos")
+
+    def advance(self, new_videos: int = 0):
+        """Move on to the next day: statistics grow and each channel gets `new_videos` uploads"""
+        with self._lock:
+            self.tick += 1
+            self.videos_per_channel += new_videos
+
+    def handle(self, method: str, params: Dict, headers: Dict):
+        with self._lock:
+            self.calls[method] += 1
+            fault = self.faults.get(method)
+            if fault and fault[0] > 0:
+                fault[0] -= 1
+                raise fault[1]
+            tick = self.tick
+            videos_per_channel = self.videos_per_channel
+        if self.latency:
+            time.sleep(self.latency)
+
+        etag = f'"{method}-{tick}"'
+        if headers.get("If-None-Match") == etag:
+            raise http_error(304, "notModified")
+
+        if method == "channels.list":
+            items = [self._channel(channel_id, params["part"], tick, videos_per_channel)
+                     for channel_id in params["id"].split(",") if channel_id in self._channel_indexes]
+        elif method == "playlistItems.list":
+            return dict(self._playlist_page(params, videos_per_channel), etag=etag)
+        elif method == "videos.list":
+            items = [video_item(video_id, params["part"], tick) for video_id in params["id"].split(",")]
+        else:
+            raise http_error(400, f"unsupported method {method}")
+        return {"etag": etag, "items": items}
+
+    def _channel(self, channel_id: str, part: str, tick: int, videos_per_channel: int) -> Dict:
+        index = self._channel_indexes[channel_id]
+        item = {"id": channel_id, "statistics": {
+            "subscriberCount": str(10_000 * (index + 1) + 25 * tick),
+            "viewCount": str(1_000_000 * (index + 1) + 5_000 * tick),
+            "videoCount": str(videos_per_channel),
+        }}
+        if "snippet" in part:
+            item["snippet"] = {"title": f"Channel {index}", "description": f"Synthetic channel {index}. " * 20}
+        return item
+
+    def _playlist_page(self, params: Dict, videos_per_channel: int) -> Dict:
+        channel_index = self._channel_indexes.get("UC" + params["playlistId"][2:])
+        if channel_index is None:
+            raise http_error(404, "playlistNotFound")
+        offset = int(params.get("pageToken") or 0)
+        end = min(offset + params["maxResults"], videos_per_channel)
+        # Newest first, like an uploads playlist
+        indexes = range(videos_per_channel - 1 - offset, videos_per_channel - 1 - end, -1)
+        page = {"items": [{"contentDetails": {"videoId": video_id_for(channel_index, i)}} for i in indexes]}
+        if end < videos_per_channel:
+            page["nextPageToken"] = str(end)
+        return page
+
+    def call_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.calls)
@@ -19,13 +19,42 @@ class Config:
     YOUTUBE_API_KEY: str = os.getenv('YOUTUBE_API_KEY')
     
     DATABASE_PATH: str = 'data/youtube.db'
+    DB_POOL_SIZE: int = 10  # Pooled SQLite connections (API workers read, one writer)
+    DB_MAX_OVERFLOW: int = 10
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection (64 MB)
+    SQLITE_MMAP_SIZE: int = 268435456  # Memory-mapped I/O (256 MB)
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000  # Wait for a lock instead of failing with 'database is locked'
+    
+    EXPORT_DIR: str = 'data/export'  # Parquet snapshot of the database, for notebooks and heavy analytics
+    EXPORT_AFTER_UPDATE: bool = True  # Refresh the export after each update (skipped if pyarrow is missing)
     
     GOLD_THRESHOLD: float = 0.8  # Top 20%
     BRONZE_THRESHOLD: float = 0.2  # Bottom 20%
+    TIER_BY_AGE_COHORT: bool = False  # Rank videos only against channel videos of similar age
     
     MAX_VIDEOS_PER_REQUEST: int = 50
     MAX_TOTAL_VIDEOS: int = 500
     
+    MAX_WORKERS: int = 8  # Channels fetched concurrently during an update
+    WRITE_QUEUE_PAGES: int = 32  # Pages of videos buffered between the fetch workers and the writer
+    WRITE_BATCH_SIZE: int = 500  # Videos of a channel committed together
+    PLAYLIST_PREFETCH_PAGES: int = 4  # Playlist pages fetched ahead of video details (0 = sequential)
+    
+    CHANNEL_ID_CACHE_TTL_DAYS: int = 30  # How long a resolved @handle/username stays valid
+    
+    DAILY_QUOTA_BUDGET: int = 10000  # YouTube Data API units per day (default project quota)
+    
+    ETAG_CACHE_ENABLED: bool = True  # Send If-None-Match on channels/videos list calls
+    ETAG_CACHE_TTL_DAYS: int = 7  # Cached ETags unused for longer are dropped at the end of each run
+    
+    API_MAX_ATTEMPTS: int = 5  # Tries per request on transient errors (5xx, rate limit, connection reset)
+    API_RETRY_BASE_DELAY: float = 1.0  # Seconds, doubled on each retry (with random jitter)
+    API_RETRY_MAX_DELAY: float = 32.0
+    API_REQUEST_DEADLINE: float = 120.0  # No retry starts past this many seconds after the first attempt
+    API_SOCKET_TIMEOUT: float = 30.0  # Per HTTP attempt
+    
+    SNIPPET_REFRESH_DAYS: int = 7  # Titles/descriptions are refetched at this cadence, statistics daily
+    
     def __post_init__(self):
         if not self.YOUTUBE_API_KEY:
             raise ValueError("YOUTUBE_API_KEY not found in .env file")
@@ -1,3 +1,4 @@
+import argparse
 import logging
 import datetime
 import traceback
@@ -19,12 +20,12 @@ logging.basicConfig(
     force=True
 )
 
-def main():
+def main(resume=False):
     start_time = datetime.datetime.now()
-    logging.info(f"Starting daily update at {start_time}")
+    logging.info(f"Starting daily update at {start_time}{' (resuming the last run)' if resume else ''}")
     
     try:
-        update_channels_data()
+        update_channels_data(resume=resume)
         logging.info("Daily update completed successfully.")
     except Exception as e:
         logging.error(f"Error during daily update: {e}")
@@ -40,4 +41,7 @@ def main():
             handler.flush()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Daily update of the channels in channels.txt")
+    parser.add_argument("--resume", action="store_true",
+                        help="only process the channels the last unfinished update did not complete")
+    main(resume=parser.parse_args().resume)
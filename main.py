@@ -1,48 +1,407 @@
+import argparse
 import logging
 import os
+import queue
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from config import config
 from app.services.youtube_api import YouTubeAPIService
-from app.data.storage import init_db, save_channel_info, save_videos
+from app.services.quota import QuotaExceededError, get_default_scheduler
+from app.services.channel_id_cache import get_default_channel_id_cache
+from app.services.response_cache import cache_entries, get_default_response_cache, is_not_modified
+from app.services.retry import get_default_retry_policy
+from app.data.export import export_parquet
+from app.data.storage import (
+    init_db, save_channel_info, save_videos, save_video_statistics, get_known_video_ids, get_tracked_video_ids,
+    get_channels_last_fetched, get_stale_snippets, update_channel_tiers, get_untiered_channel_ids,
+    start_update_run, resume_update_run, record_run_channel, finish_update_run, CHANNEL_DONE, CHANNEL_FAILED,
+    compact_legacy_history, vacuum_database, is_uploads_walk_complete, set_uploads_walk_complete
+)
 
 logging.basicConfig(level=logging.INFO)
 
+# Each worker thread gets its own API client (the underlying HTTP client is not thread-safe)
+_worker_state = threading.local()
+
+# Messages streamed by the fetch workers to the writer stage: (identifier, kind, payload)
+# Items carry the ETag cache entry of their response (see response_cache.cache_entries)
+MSG_CHANNEL = "channel"  # payload: channel info
+MSG_VIDEOS = "videos"    # payload: one page of video items
+MSG_DONE = "done"        # payload: None, or the error that stopped the channel
+
 def read_channels_from_file(file_path="channels.txt"):
     """Read channel identifiers from a text file, one per line."""
     if not os.path.exists(file_path):
         logging.error(f"Channels file not found: {file_path}")
         return []
-    
+
     with open(file_path, 'r', encoding='utf-8') as f:
         channels = [line.strip() for line in f.readlines() if line.strip()]
-    
+
     logging.info(f"Loaded {len(channels)} channels from {file_path}")
     return channels
 
-def update_channels_data():
-    """Update data for all channels in the channels.txt file."""
+def get_worker_service():
+    """Return the YouTubeAPIService owned by the current worker thread."""
+    yt = getattr(_worker_state, "yt", None)
+    if yt is None:
+        yt = YouTubeAPIService()
+        _worker_state.yt = yt
+    return yt
+
+def fetch_channel_data(identifier, emit, incremental=True, full_refresh=False):
+    """Fetch channel info, then video pages, for one channel. Runs in a worker thread, never writes to the DB.
+
+    The channel info and every page of videos are handed to `emit(kind, payload)` as soon
+    as they arrive, so nothing beyond one page is held here. Returns False if the channel
+    cannot be found.
+
+    Snippets (titles, descriptions) are only requested when older than
+    config.SNIPPET_REFRESH_DAYS, or for every resource with `full_refresh`.
+    """
+    yt = get_worker_service()
+    logging.info(f"Fetching data for channel: {identifier}")
+    channel_id = yt.resolve_channel_identifier(identifier)
+    if not channel_id:
+        logging.error(f"Cannot find channel ID for identifier: {identifier}")
+        return False
+
+    # Read before MSG_CHANNEL, which marks the walk as started. Until a walk gets through,
+    # older pages may be missing: do not stop at the first known video.
+    stop_at_known = incremental and is_uploads_walk_complete(channel_id)
+
+    if full_refresh:
+        refresh_channel_snippet, snippet_video_ids = True, None
+    else:
+        max_age = timedelta(days=config.SNIPPET_REFRESH_DAYS)
+        refresh_channel_snippet, snippet_video_ids = get_stale_snippets(channel_id, max_age)
+
+    ch_info = yt.get_channel_info(identifier, include_snippet=refresh_channel_snippet)
+    if not ch_info:
+        logging.warning(f"Could not fetch info for channel {identifier}")
+        return False
+    emit(MSG_CHANNEL, ch_info)
+
+    known_video_ids = get_known_video_ids(ch_info["id"]) if incremental else None
+    # Pass the resolved ID so the identifier is not resolved a second time
+    for page in yt.iter_channel_video_pages(ch_info["id"], max_results=200, known_video_ids=known_video_ids,
+                                            snippet_video_ids=snippet_video_ids, stop_at_known=stop_at_known):
+        emit(MSG_VIDEOS, page)
+    return True
+
+class WriterStopped(Exception):
+    """The writer stage is gone: fetch workers must stop producing"""
+
+def put_message(messages, stop, message):
+    """Put a message on the bounded writer queue, blocking while it is full"""
+    while True:
+        if stop.is_set():
+            raise WriterStopped()
+        try:
+            messages.put(message, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+def run_fetch_worker(identifier, messages, stop, incremental, full_refresh):
+    """Worker entry point: stream one channel to the writer, always ending with a MSG_DONE message"""
+    def emit(kind, payload):
+        put_message(messages, stop, (identifier, kind, payload))
+
+    try:
+        found = fetch_channel_data(identifier, emit, incremental, full_refresh)
+        error = None if found else LookupError(f"Channel not found: {identifier}")
+    except WriterStopped:
+        return
+    except Exception as e:
+        error = e
+    try:
+        emit(MSG_DONE, error)
+    except WriterStopped:
+        pass
+
+def write_channel_info(ch_info):
+    """Persist channel info, with its ETag. Only called from the writer stage."""
+    # A 304 Not Modified carries the cached statistics: fetched_at and today's snapshot are still updated
+    save_channel_info(ch_info, cache_entries([ch_info]))
+
+def write_videos(identifier, channel_id, vids):
+    """Persist a batch of fetched videos for one channel, with the ETags of their pages. Only called from the writer stage.
+
+    The ETags are committed with the rows they cover, so a failed write leaves no ETag behind.
+    Returns True if metrics of at least one video were recomputed (tiers need a refresh).
+    """
+    unchanged = sum(1 for v in vids if is_not_modified(v))
+    if unchanged:
+        logging.info(f"{unchanged} videos unchanged since last fetch for channel {identifier}")
+
+    # Statistics-only items (304 answers included) skip the snippet columns entirely
+    full_vids = [v for v in vids if "snippet" in v]
+    stats_vids = [v for v in vids if "snippet" not in v]
+    stats_changed = False
+    if full_vids:
+        stats_changed = save_videos(channel_id, full_vids, cache_entries(full_vids)) > 0
+    if save_video_statistics(stats_vids, cache_entries(stats_vids)):
+        stats_changed = True
+    logging.info(f"Saved {len(vids)} videos ({len(full_vids)} with snippet) for channel {identifier}")
+    return stats_changed
+
+def flush_worker_caches(prune=False):
+    """Persist the identifier resolutions gathered by the API workers. Only called from the writer stage.
+
+    With `prune`, also drop the ETags unused for config.ETAG_CACHE_TTL_DAYS (end of a run).
+    """
+    get_default_channel_id_cache().flush()
+    if prune and config.ETAG_CACHE_ENABLED:
+        get_default_response_cache().prune(timedelta(days=config.ETAG_CACHE_TTL_DAYS))
+
+def update_tiers(changed_channel_ids):
+    """Recompute tiers of the channels whose statistics changed, plus any channel never tiered"""
+    channel_ids = set(changed_channel_ids) | get_untiered_channel_ids()
+    if not channel_ids:
+        logging.info("No statistics changed, tiers are up to date")
+        return
+    tiered = update_channel_tiers(
+        channel_ids, config.GOLD_THRESHOLD, config.BRONZE_THRESHOLD, by_age_cohort=config.TIER_BY_AGE_COHORT
+    )
+    logging.info(f"Recomputed tiers of {tiered} videos in {len(channel_ids)} channels")
+
+def export_after_update():
+    """Incrementally refresh the Parquet export; never fails the update itself"""
+    if not config.EXPORT_AFTER_UPDATE:
+        return
+    try:
+        export_parquet()
+    except ImportError as e:
+        logging.info(f"Parquet export skipped: {e}")
+    except Exception as e:
+        logging.error(f"Parquet export failed: {e}")
+
+def prioritize_channels(identifiers):
+    """Order channels stalest first: never fetched, then oldest fetched_at. Ties keep file order."""
+    last_fetched = get_channels_last_fetched(identifiers)
+    return sorted(identifiers, key=lambda identifier: last_fetched.get(identifier) or datetime.min)
+
+def cancel_pending(futures):
+    """Cancel futures that have not started yet, return how many were cancelled by this call"""
+    # cancel() also returns True for a future cancelled earlier: only count state changes
+    return sum(1 for future in futures if not future.done() and future.cancel())
+
+def update_channels_data(max_workers=None, incremental=True, full_refresh=False, resume=False, write_batch_size=None):
+    """Update data for all channels in the channels.txt file.
+
+    API calls run concurrently in a pool of `max_workers` threads (defaults to
+    config.MAX_WORKERS), while all SQLite writes happen in the calling thread.
+    Workers stream pages of videos through a bounded queue; the writer commits
+    them every `write_batch_size` videos per channel (config.WRITE_BATCH_SIZE),
+    so memory stays flat and partial progress is durable.
+    In incremental mode only uploads newer than the stored videos are paged
+    through; stored videos just get their statistics refreshed.
+
+    Snippets are refreshed every config.SNIPPET_REFRESH_DAYS, or for everything
+    with `full_refresh`. Channels are processed stalest first. When the daily quota budget runs out,
+    the remaining channels are left for the next run.
+
+    Each channel's outcome is checkpointed in the run ledger. With `resume`, only the
+    channels that the latest unfinished run did not complete are processed.
+    A channel whose last uploads walk did not get through (failure, crash) is paged
+    through entirely on its next incremental run, as its newest pages may already
+    be stored while older ones are missing.
+    """
     init_db()
-    yt = YouTubeAPIService()
-    channels_to_fetch = read_channels_from_file()
-    
-    if not channels_to_fetch:
-        logging.warning("No channels to fetch. Please add channels to channels.txt")
+    scheduler = get_default_scheduler()
+    if scheduler.remaining <= 0:
+        logging.warning(f"No quota left for today: {scheduler.summary()}")
         return
-    
-    for identifier in channels_to_fetch:
-        logging.info(f"Fetching data for channel: {identifier}")
-        ch_info = yt.get_channel_info(identifier)
-        if not ch_info:
-            logging.warning(f"Could not fetch info for channel {identifier}")
-            continue
-        save_channel_info(ch_info)
 
-        vids = yt.get_channel_videos(identifier, max_results=200)
-        if vids:
-            save_videos(ch_info["id"], vids)
-            logging.info(f"Saved {len(vids)} videos for channel {identifier}")
-        else:
-            logging.warning(f"No videos fetched for channel {identifier}")
+    resumed = resume_update_run() if resume else None
+    if resumed:
+        run_id, channels_to_fetch = resumed
+        logging.info(f"Resuming update run {run_id}: {len(channels_to_fetch)} channels left")
+        if not channels_to_fetch:
+            finish_update_run(run_id)
+            return
+    else:
+        if resume:
+            logging.info("No unfinished update run to resume, starting a new one")
+        channels_to_fetch = read_channels_from_file()
+        if not channels_to_fetch:
+            logging.warning("No channels to fetch. Please add channels to channels.txt")
+            return
+        channels_to_fetch = prioritize_channels(channels_to_fetch)
+        run_id = start_update_run(channels_to_fetch)
+
+    if max_workers is None:
+        max_workers = config.MAX_WORKERS
+    if write_batch_size is None:
+        write_batch_size = config.WRITE_BATCH_SIZE
+    max_workers = max(1, min(max_workers, len(channels_to_fetch)))
+    logging.info(f"Fetching {len(channels_to_fetch)} channels with {max_workers} workers")
+
+    messages = queue.Queue(maxsize=config.WRITE_QUEUE_PAGES)
+    stop = threading.Event()
+    channel_ids = {}
+    pending = {}
+    errors = {}
+    changed_channel_ids = set()
+
+    def flush(identifier):
+        vids = pending.pop(identifier, [])
+        if vids and write_videos(identifier, channel_ids[identifier], vids):
+            changed_channel_ids.add(channel_ids[identifier])
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest") as executor:
+        futures = [
+            executor.submit(run_fetch_worker, identifier, messages, stop, incremental, full_refresh)
+            for identifier in channels_to_fetch
+        ]
+        outstanding = len(futures)
+
+        # Writer stage: channel info and video pages are saved as workers stream them
+        try:
+            while outstanding:
+                identifier, kind, payload = messages.get()
+                try:
+                    if kind == MSG_CHANNEL:
+                        channel_ids[identifier] = payload["id"]
+                        write_channel_info(payload)
+                        # Until MSG_DONE, a crash or failure leaves older pages to fetch again
+                        set_uploads_walk_complete(payload["id"], False)
+                    elif kind == MSG_VIDEOS:
+                        pending.setdefault(identifier, []).extend(payload)
+                        if len(pending[identifier]) >= write_batch_size:
+                            flush(identifier)
+                    else:
+                        outstanding -= 1
+                        flush(identifier)
+                        flush_worker_caches()
+                        if payload is None and identifier not in errors:
+                            set_uploads_walk_complete(channel_ids[identifier], True)
+                except Exception as e:
+                    logging.error(f"Error while saving channel {identifier}: {e}")
+                    errors.setdefault(identifier, e)
+                    pending.pop(identifier, None)
+                if kind != MSG_DONE:
+                    continue
+
+                error = errors.pop(identifier, None) or payload
+                if error is None:
+                    record_run_channel(run_id, identifier, CHANNEL_DONE, channel_id=channel_ids.get(identifier))
+                    continue
+                record_run_channel(run_id, identifier, CHANNEL_FAILED, channel_id=channel_ids.get(identifier), error=error)
+                if isinstance(error, QuotaExceededError):
+                    skipped = cancel_pending(futures)
+                    outstanding -= skipped
+                    if skipped:
+                        logging.warning(f"{error}. {skipped} channels left for the next run (use --resume).")
+                elif not isinstance(error, LookupError):
+                    logging.error(f"Error while updating channel {identifier}: {error}")
+        finally:
+            # Unblock workers if the writer stops early
+            stop.set()
+            scheduler.flush()
+
+    flush_worker_caches(prune=True)
+    update_tiers(changed_channel_ids)
+    counts = finish_update_run(run_id)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    logging.info(f"Data update completed (run {run_id}: {summary}). Quota: {scheduler.summary()}. "
+                 f"Retries: {get_default_retry_policy().summary()}")
+    export_after_update()
 
-    logging.info("Data update completed.")
+def fetch_video_statistics(video_ids):
+    """Fetch statistics for one batch of video IDs. Runs in a worker thread."""
+    return get_worker_service().get_video_statistics(video_ids)
+
+def refresh_video_stats(max_workers=None, write_batch_size=1000):
+    """Refresh statistics of every tracked (non-hidden) video without walking playlists.
+
+    Video IDs from all channels are packed into full videos().list batches that run
+    concurrently; results are bulk-written from the calling thread.
+    """
+    init_db()
+    video_ids = get_tracked_video_ids()
+    if not video_ids:
+        logging.warning("No stored videos to refresh. Run a full update first.")
+        return
+
+    scheduler = get_default_scheduler()
+
+    batch_size = config.MAX_VIDEOS_PER_REQUEST
+    batches = [video_ids[i:i + batch_size] for i in range(0, len(video_ids), batch_size)]
+    if max_workers is None:
+        max_workers = config.MAX_WORKERS
+    max_workers = max(1, min(max_workers, len(batches)))
+    logging.info(f"Refreshing statistics for {len(video_ids)} videos in {len(batches)} batches with {max_workers} workers")
+
+    pending = []
+    refreshed = 0
+    changed_channel_ids = set()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stats") as executor:
+        futures = [executor.submit(fetch_video_statistics, batch) for batch in batches]
+
+        # Writer stage: buffer results and write them in bulk
+        try:
+            for future in as_completed(futures):
+                try:
+                    pending.extend(future.result())
+                except CancelledError:
+                    continue
+                except QuotaExceededError as e:
+                    skipped = cancel_pending(futures)
+                    if skipped:
+                        logging.warning(f"{e}. {skipped} statistics batches skipped.")
+                except Exception as e:
+                    logging.error(f"Error while refreshing a statistics batch: {e}")
+                if len(pending) >= write_batch_size:
+                    changed_channel_ids |= save_video_statistics(pending, cache_entries(pending))
+                    refreshed += len(pending)
+                    pending = []
+                    flush_worker_caches()
+        finally:
+            scheduler.flush()
+
+    changed_channel_ids |= save_video_statistics(pending, cache_entries(pending))
+    refreshed += len(pending)
+    flush_worker_caches(prune=True)
+    update_tiers(changed_channel_ids)
+    logging.info(f"Statistics refresh completed: {refreshed}/{len(video_ids)} videos updated. Quota: {scheduler.summary()}. "
+                 f"Retries: {get_default_retry_policy().summary()}")
+    export_after_update()
+
+def compact_database():
+    """Maintenance: rewrite the legacy JSON history as compact blobs, then VACUUM to shrink the file.
+
+    VACUUM needs exclusive access, so run it while the dashboard and scheduled updates are stopped.
+    """
+    init_db()
+    compacted = compact_legacy_history()
+    logging.info(f"Compacted the legacy history of {compacted} channels and videos, vacuuming the database")
+    vacuum_database()
+    logging.info("Database compaction completed")
 
 if __name__ == "__main__":
-    update_channels_data()
+    parser = argparse.ArgumentParser(description="Fetch YouTube data for the channels in channels.txt")
+    parser.add_argument("--stats-only", action="store_true",
+                        help="only refresh statistics of already stored videos, without walking playlists")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="refetch titles and descriptions of every channel and video")
+    parser.add_argument("--resume", action="store_true",
+                        help="only process the channels the last unfinished update did not complete")
+    parser.add_argument("--export", action="store_true",
+                        help="only rewrite the whole Parquet export (see config.EXPORT_DIR), without calling the API")
+    parser.add_argument("--compact-history", action="store_true",
+                        help="maintenance: rewrite the legacy JSON history columns as compact blobs and VACUUM the "
+                             "database (stop the dashboard and scheduled updates first)")
+    args = parser.parse_args()
+
+    if args.compact_history:
+        compact_database()
+    elif args.export:
+        init_db()
+        export_parquet(full=True)
+    elif args.stats_only:
+        refresh_video_stats()
+    else:
+        update_channels_data(full_refresh=args.full_refresh, resume=args.resume)
@@ -1,34 +1,111 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from app.data.storage import (
-    Channel, Video, Base, 
-    get_channel_subscriber_history, 
-    get_channel_view_history, 
-    get_video_view_history,
-    get_channel_video_publication_dates
+    init_db,
+    get_data_version,
+    get_channels_data,
+    get_channel_data,
+    query_videos_page,
+    get_video_data,
+    get_channel_history_arrays,
+    get_video_view_history_arrays,
+    get_channel_video_publication_dates,
+    delete_channel,
+    set_video_hidden,
+    set_video_analysis,
+    update_channel_tiers
 )
+from app.analytics import interpolate_at_dates, TIER_GOLD, TIER_SILVER, TIER_BRONZE
+from config import config
 import plotly.graph_objects as go
 from datetime import datetime
 
-DB_PATH = "sqlite:///data/youtube.db"
-engine = create_engine(DB_PATH)
-Session = sessionmaker(bind=engine)
-
 st.title("📺 YouTube Dashboard")
 
-def get_channels():
-    with Session() as sess:
-        return sess.query(Channel).all()
+@st.cache_resource
+def setup_database():
+    """Create missing tables/columns once per server process"""
+    init_db()
+
+setup_database()
+
+# === CACHED DATA ACCESS ===
+# Every loader takes the DB data version as argument: the ingestion writer bumps it,
+# so cached results are reused across reruns until the data actually changes.
+
+@st.cache_data(ttl=10, show_spinner=False)
+def load_data_version():
+    return get_data_version()
+
+def refresh_data():
+    """Call after a write from the dashboard so the next rerun sees it immediately"""
+    load_data_version.clear()
 
-def get_videos_for_channel(channel_id, only_hidden=False):
-    with Session() as sess:
-        return sess.query(Video).filter(Video.channel_id == channel_id, Video.hidden == only_hidden).order_by(Video.published_at.desc()).all()
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_channels(data_version):
+    return pd.DataFrame(get_channels_data())
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_channel(channel_id, data_version):
+    return get_channel_data(channel_id)
+
+SORT_OPTIONS = {
+    "published_at": "Publication date",
+    "view_count": "Views",
+    "like_count": "Likes",
+    "comment_count": "Comments",
+    "engagement": "Engagement",
+    "views_per_day": "Views/day",
+    "tier_score": "Tier score",
+    "title": "Title",
+}
+
+TIER_LABELS = {
+    TIER_GOLD: "🥇 Gold",
+    TIER_SILVER: "🥈 Silver",
+    TIER_BRONZE: "🥉 Bronze",
+}
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_video_page(channel_id, only_hidden, page, page_size, sort_by, descending, filters, data_version):
+    """One page of the videos table, sorted and filtered by the database. Returns (table, total)"""
+    rows, total = query_videos_page(
+        channel_id, hidden=only_hidden, page=page, page_size=page_size,
+        sort_by=sort_by, descending=descending, **dict(filters)
+    )
+    data = []
+    for vid in rows:
+        data.append({
+            "Title": vid["title"],
+            "Date": vid["published_at"].strftime("%Y-%m-%d"),
+            "Views": vid["view_count"],
+            "Likes": vid["like_count"],
+            "Like Ratio": f"{vid['like_rate']:.2f}%" if vid["view_count"] and vid["like_rate"] is not None else "-",
+            "Comments": vid["comment_count"],
+            "Tier": TIER_LABELS.get(vid["tier"], "-"),
+            "Link": f"https://www.youtube.com/watch?v={vid['id']}",
+            "ID": vid["id"],
+        })
+    return pd.DataFrame(data), total
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_video(video_id, data_version):
+    return get_video_data(video_id)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_channel_history(channel_id, data_version):
+    """(subscriber history, view history, publications); histories are (dates, counts) arrays"""
+    subscriber_history, view_history = get_channel_history_arrays(channel_id)
+    return subscriber_history, view_history, get_channel_video_publication_dates(channel_id)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_video_view_history(video_id, data_version):
+    return get_video_view_history_arrays(video_id)
 
 def create_evolution_chart(history_data, video_publications, title, y_label, color="#4ecdc4"):
-    """Create evolution chart with video publication markers"""
-    if not history_data:
+    """Create evolution chart with video publication markers from a (dates, counts) history, sorted by date"""
+    history_dates, history_counts = history_data
+    if len(history_dates) == 0:
         fig = go.Figure()
         fig.add_annotation(
             text="No historical data available",
@@ -39,18 +116,13 @@ def create_evolution_chart(history_data, video_publications, title, y_label, col
         fig.update_layout(title=title, height=400)
         return fig
     
-    # Prepare data
-    df_history = pd.DataFrame(history_data)
-    df_history['date'] = pd.to_datetime(df_history['date'])
-    df_history = df_history.sort_values('date')
-    
     # Create main chart
     fig = go.Figure()
     
     # Evolution line
     fig.add_trace(go.Scatter(
-        x=df_history['date'],
-        y=df_history['count'],
+        x=history_dates,
+        y=history_counts,
         mode='lines+markers',
         name=y_label,
         line=dict(color=color, width=3),
@@ -60,36 +132,11 @@ def create_evolution_chart(history_data, video_publications, title, y_label, col
     
     # Add video publication markers
     if video_publications:
-        video_dates = []
-        video_titles = []
-        video_y_values = []
-        
-        for video in video_publications:
-            video_date = pd.to_datetime(video['date'])
-            # Interpolate Y value for video date
-            if len(df_history) > 1:
-                # Find interpolated value
-                if video_date <= df_history['date'].min():
-                    y_val = df_history['count'].iloc[0]
-                elif video_date >= df_history['date'].max():
-                    y_val = df_history['count'].iloc[-1]
-                else:
-                    # Linear interpolation
-                    idx = df_history[df_history['date'] <= video_date].index[-1]
-                    if idx < len(df_history) - 1:
-                        x1, y1 = df_history.loc[idx, 'date'], df_history.loc[idx, 'count']
-                        x2, y2 = df_history.loc[idx + 1, 'date'], df_history.loc[idx + 1, 'count']
-                        # Interpolation
-                        ratio = (video_date - x1) / (x2 - x1)
-                        y_val = y1 + ratio * (y2 - y1)
-                    else:
-                        y_val = df_history.loc[idx, 'count']
-            else:
-                y_val = df_history['count'].iloc[0] if len(df_history) > 0 else 0
-            
-            video_dates.append(video_date)
-            video_titles.append(video['title'][:50] + "..." if len(video['title']) > 50 else video['title'])
-            video_y_values.append(y_val)
+        df_videos = pd.DataFrame(video_publications)
+        video_dates = pd.to_datetime(df_videos['date'])
+        # Y value of each marker, interpolated on the evolution line
+        video_y_values = interpolate_at_dates(history_dates, history_counts, video_dates)
+        video_titles = [title[:50] + "..." if len(title) > 50 else title for title in df_videos['title']]
         
         # Add video markers
         fig.add_trace(go.Scatter(
@@ -127,8 +174,9 @@ def create_evolution_chart(history_data, video_publications, title, y_label, col
     return fig
 
 def create_video_evolution_chart(video_history, video_title):
-    """Create evolution chart for a specific video's views"""
-    if not video_history:
+    """Create evolution chart for a specific video's views from a (dates, counts) history, sorted by date"""
+    history_dates, history_counts = video_history
+    if len(history_dates) == 0:
         fig = go.Figure()
         fig.add_annotation(
             text="No historical data available for this video",
@@ -139,18 +187,13 @@ def create_video_evolution_chart(video_history, video_title):
         fig.update_layout(title=f"📈 View Evolution - {video_title[:50]}...", height=350)
         return fig
     
-    # Prepare data
-    df_history = pd.DataFrame(video_history)
-    df_history['date'] = pd.to_datetime(df_history['date'])
-    df_history = df_history.sort_values('date')
-    
     # Create chart
     fig = go.Figure()
     
     # Evolution line
     fig.add_trace(go.Scatter(
-        x=df_history['date'],
-        y=df_history['count'],
+        x=history_dates,
+        y=history_counts,
         mode='lines+markers',
         name='Views',
         line=dict(color='#45b7d1', width=3),
@@ -161,9 +204,9 @@ def create_video_evolution_chart(video_history, video_title):
     ))
     
     # Calculate growth if we have more than one point
-    if len(df_history) > 1:
-        growth = int(df_history['count'].iloc[-1] - df_history['count'].iloc[0])
-        growth_percent = (growth / df_history['count'].iloc[0] * 100) if df_history['count'].iloc[0] > 0 else 0
+    if len(history_counts) > 1:
+        growth = int(history_counts[-1] - history_counts[0])
+        growth_percent = (growth / history_counts[0] * 100) if history_counts[0] > 0 else 0
         
         subtitle = f"Growth: +{growth:,} views ({growth_percent:+.1f}%)"
     else:
@@ -186,34 +229,34 @@ def create_video_evolution_chart(video_history, video_title):
     return fig
 
 # === SIDEBAR ===
-channels = get_channels()
+data_version = load_data_version()
+channels = load_channels(data_version)
+channel_titles = dict(zip(channels["id"], channels["title"])) if not channels.empty else {}
 st.sidebar.title("Channel List")
 
 selected_channel_id = st.sidebar.radio(
     "Click on a channel to see videos",
-    [ch.id for ch in channels],
-    format_func=lambda ch_id: next((ch.title for ch in channels if ch.id == ch_id), "Unknown")
+    list(channel_titles),
+    format_func=lambda ch_id: channel_titles.get(ch_id, "Unknown")
 )
 
 # === MAIN ===
-if selected_channel_id:
-    ch = next((c for c in channels if c.id == selected_channel_id), None)
+ch = load_channel(selected_channel_id, data_version) if selected_channel_id else None
+if ch:
       
-    st.header(ch.title)
+    st.header(ch["title"])
 
-    if st.button("🗑️ Delete this channel", key=f"del_{ch.id}"):
-        st.session_state["delete_confirm_channel_id"] = ch.id
+    if st.button("🗑️ Delete this channel", key=f"del_{ch['id']}"):
+        st.session_state["delete_confirm_channel_id"] = ch["id"]
 
-    st.write(f"Description: {ch.description}")
-    st.write(f"Subscribers: {ch.subscribers or 'N/A'}")
+    st.write(f"Description: {ch['description']}")
+    st.write(f"Subscribers: {ch['subscribers'] or 'N/A'}")
 
     # === EVOLUTION CHARTS FOR THE CHANNEL ===
     st.subheader("📊 Channel Evolution")
     
     # Get historical data
-    subscriber_history = get_channel_subscriber_history(ch.id)
-    view_history = get_channel_view_history(ch.id)
-    video_publications = get_channel_video_publication_dates(ch.id)
+    subscriber_history, view_history, video_publications = load_channel_history(ch["id"], data_version)
     
     # Subscribers chart
     fig_subscribers = create_evolution_chart(
@@ -237,40 +280,67 @@ if selected_channel_id:
     
     # Channel deletion confirmation
     delete_id = st.session_state.get("delete_confirm_channel_id")
-    if delete_id == ch.id:
+    if delete_id == ch["id"]:
         st.warning("⚠️ This action will permanently delete the channel AND all its videos. Are you sure?")
         col1, col2 = st.columns([1,1])
         with col1:
-            if st.button("Yes, delete", key=f"conf_del_{ch.id}"):
-                with Session() as sess:
-                    sess.query(Video).filter(Video.channel_id == ch.id).delete()
-                    sess.query(Channel).filter(Channel.id == ch.id).delete()
-                    sess.commit()
+            if st.button("Yes, delete", key=f"conf_del_{ch['id']}"):
+                delete_channel(ch["id"])
+                refresh_data()
                 st.success("Channel deleted!")
                 st.session_state.pop("delete_confirm_channel_id")
                 st.rerun()
         with col2:
-            if st.button("Cancel", key=f"ann_{ch.id}"):
+            if st.button("Cancel", key=f"ann_{ch['id']}"):
                 st.session_state.pop("delete_confirm_channel_id")
 
     show_hidden = st.checkbox("Show hidden videos", value=False)
-    videos = get_videos_for_channel(ch.id, only_hidden=show_hidden)
-    st.subheader(f"Videos ({len(videos)})")
 
-    data = []
-    for vid in videos:
-        data.append({
-            "Title": vid.title,
-            "Date": vid.published_at.strftime("%Y-%m-%d"),
-            "Views": vid.view_count,
-            "Likes": vid.like_count,
-            "Like Ratio": f"{(vid.like_count / vid.view_count * 100):.2f}%" if vid.view_count else "-",
-            "Comments": vid.comment_count,
-            "Link": f"https://www.youtube.com/watch?v={vid.id}",
-            "ID": vid.id,
-        })
-    
-    df = pd.DataFrame(data)
+    # Sorting, filtering and pagination all happen in SQL
+    col_sort, col_order, col_size = st.columns([2, 1, 1])
+    with col_sort:
+        sort_by = st.selectbox("Sort by", list(SORT_OPTIONS), format_func=SORT_OPTIONS.get, key="video_sort")
+    with col_order:
+        descending = st.toggle("Descending", value=True, key="video_descending")
+    with col_size:
+        page_size = st.selectbox("Per page", [25, 50, 100, 200], index=1, key="video_page_size")
+
+    with st.expander("🔎 Filters"):
+        col_filter1, col_filter2, col_filter3, col_filter4 = st.columns(4)
+        with col_filter1:
+            date_range = st.date_input("Published between", value=(), key="video_date_range")
+        with col_filter2:
+            min_views = st.number_input("Min views", min_value=0, value=0, step=1000, key="video_min_views")
+        with col_filter3:
+            min_engagement = st.number_input("Min engagement (%)", min_value=0.0, value=0.0, step=0.5, key="video_min_engagement")
+        with col_filter4:
+            tiers = st.multiselect("Tier", list(TIER_LABELS), format_func=TIER_LABELS.get, key="video_tiers")
+
+    filters = {}
+    if len(date_range) == 2:
+        filters["published_after"] = datetime.combine(date_range[0], datetime.min.time())
+        filters["published_before"] = datetime.combine(date_range[1], datetime.max.time())
+    if min_views:
+        filters["min_views"] = int(min_views)
+    if min_engagement:
+        filters["min_engagement"] = float(min_engagement)
+    if tiers:
+        filters["tiers"] = tuple(tiers)
+    filters = tuple(sorted(filters.items()))
+
+    page = st.session_state.get("video_page", 1)
+    df, total_videos = load_video_page(
+        ch["id"], show_hidden, page - 1, page_size, sort_by, descending, filters, data_version
+    )
+    page_count = max(1, -(-total_videos // page_size))
+    if page > page_count:
+        # Filters shrank the result set: go back to the first page
+        st.session_state["video_page"] = page = 1
+        df, total_videos = load_video_page(
+            ch["id"], show_hidden, 0, page_size, sort_by, descending, filters, data_version
+        )
+
+    st.subheader(f"Videos ({total_videos})")
     
     # Column configuration with clickable links
     column_config = {
@@ -295,12 +365,14 @@ if selected_channel_id:
         key="video_table"
     )
     
+    st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="video_page")
+    
     # Selection handling
     selected_rows = event.selection.rows
     
-    if selected_rows:
+    if selected_rows and selected_rows[0] < len(df):
         selected_idx = selected_rows[0]
-        selected_video = videos[selected_idx]
+        selected_video = load_video(df.iloc[selected_idx]["ID"], data_version)
         
         # Card with selected video info
         with st.container():
@@ -311,19 +383,19 @@ if selected_channel_id:
             col1, col2 = st.columns([2, 1])
             
             with col1:
-                st.markdown(f"**📺 {selected_video.title}**")
-                st.caption(f"Published on {selected_video.published_at.strftime('%d/%m/%Y')}")
-                if hasattr(selected_video, 'description') and selected_video.description:
+                st.markdown(f"**📺 {selected_video['title']}**")
+                st.caption(f"Published on {selected_video['published_at'].strftime('%d/%m/%Y')}")
+                if selected_video.get("description"):
                     with st.expander("📝 Description"):
                         # Length and copy button row
                         col_info, col_copy = st.columns([3, 1])
                         
                         with col_info:
-                            st.caption(f"📏 {len(selected_video.description)} characters")
+                            st.caption(f"📏 {len(selected_video['description'])} characters")
                         
                         with col_copy:
-                            if st.button("📋", help="Copy description", key=f"copy_desc_{selected_video.id}"):
-                                st.code(selected_video.description, language=None)
+                            if st.button("📋", help="Copy description", key=f"copy_desc_{selected_video['id']}"):
+                                st.code(selected_video['description'], language=None)
                                 st.success("✅ Description copied above!")
                         
                         # Scrollable styled container
@@ -340,24 +412,24 @@ if selected_channel_id:
                                 line-height: 1.6;
                                 white-space: pre-wrap;
                             ">
-                            {selected_video.description}
+                            {selected_video['description']}
                             </div>
                             """, 
                             unsafe_allow_html=True
                         )
             
             with col2:
-                st.metric("👀 Views", f"{selected_video.view_count:,}")
-                st.metric("👍 Likes", f"{selected_video.like_count:,}")
-                st.metric("💬 Comments", f"{selected_video.comment_count:,}")
+                st.metric("👀 Views", f"{selected_video['view_count']:,}")
+                st.metric("👍 Likes", f"{selected_video['like_count']:,}")
+                st.metric("💬 Comments", f"{selected_video['comment_count']:,}")
 
             # --- STATISTICS SECTION ---
             st.subheader("📊 Statistics")
             
-            # Basic calculations
-            engagement = (selected_video.like_count + selected_video.comment_count) / selected_video.view_count * 100 if selected_video.view_count > 0 else 0
-            like_percent = selected_video.like_count / selected_video.view_count * 100 if selected_video.view_count > 0 else 0
-            comment_percent = selected_video.comment_count / selected_video.view_count * 100 if selected_video.view_count > 0 else 0
+            # Metrics are computed at ingest time (video_metrics table)
+            engagement = selected_video['engagement_rate'] or 0
+            like_percent = selected_video['like_rate'] or 0
+            comment_percent = selected_video['comment_rate'] or 0
             
             # Basic metrics
             col_stat1, col_stat2, col_stat3 = st.columns(3)
@@ -384,14 +456,14 @@ if selected_channel_id:
                 )
             
             # --- DETAILED ANALYSIS ---
-            details_key = f"show_details_{selected_video.id}"
+            details_key = f"show_details_{selected_video['id']}"
             if details_key not in st.session_state:
                 st.session_state[details_key] = False
             
             # Toggle button for details
             if st.button(
                 f"🔢 {'Hide' if st.session_state[details_key] else 'Show'} details {'⬆️' if st.session_state[details_key] else '⬇️'}", 
-                key=f"toggle_details_{selected_video.id}"
+                key=f"toggle_details_{selected_video['id']}"
             ):
                 st.session_state[details_key] = not st.session_state[details_key]
                 st.rerun()
@@ -403,8 +475,8 @@ if selected_channel_id:
                     st.subheader("📈 Detailed Analysis")
                     
                     # === VIDEO VIEW EVOLUTION CHART ===
-                    video_view_history = get_video_view_history(selected_video.id)
-                    fig_video_evolution = create_video_evolution_chart(video_view_history, selected_video.title)
+                    video_view_history = load_video_view_history(selected_video['id'], data_version)
+                    fig_video_evolution = create_video_evolution_chart(video_view_history, selected_video['title'])
                     st.plotly_chart(fig_video_evolution, use_container_width=True)
                     
                     # Advanced metrics
@@ -415,12 +487,12 @@ if selected_channel_id:
                     with col_detail1:
                         st.metric(
                             label="👥 Total Views",
-                            value=f"{selected_video.view_count:,}",
+                            value=f"{selected_video['view_count']:,}",
                             help="Total number of views"
                         )
                     
                     with col_detail2:
-                        like_ratio = selected_video.like_count / selected_video.view_count * 1000 if selected_video.view_count > 0 else 0
+                        like_ratio = selected_video['likes_per_1000'] or 0
                         st.metric(
                             label="👍 Likes/1000 views",
                             value=f"{like_ratio:.1f}",
@@ -428,7 +500,7 @@ if selected_channel_id:
                         )
                     
                     with col_detail3:
-                        comment_ratio = selected_video.comment_count / selected_video.view_count * 1000 if selected_video.view_count > 0 else 0
+                        comment_ratio = selected_video['comments_per_1000'] or 0
                         st.metric(
                             label="💬 Comments/1000 views",
                             value=f"{comment_ratio:.1f}",
@@ -436,8 +508,8 @@ if selected_channel_id:
                         )
                     
                     with col_detail4:
-                        if selected_video.like_count > 0:
-                            comment_like_ratio = selected_video.comment_count / selected_video.like_count
+                        if selected_video['comments_per_like'] is not None:
+                            comment_like_ratio = selected_video['comments_per_like']
                             st.metric(
                                 label="🗣️ Comments/Like",
                                 value=f"{comment_like_ratio:.2f}",
@@ -453,7 +525,7 @@ if selected_channel_id:
                     # Temporal analysis
                     st.subheader("📅 Temporal Analysis")
                     
-                    days_since_publish = (pd.Timestamp.now() - selected_video.published_at).days
+                    days_since_publish = (pd.Timestamp.now() - selected_video['published_at']).days
                     
                     col_time1, col_time2, col_time3 = st.columns(3)
                     
@@ -465,8 +537,8 @@ if selected_channel_id:
                         )
                     
                     with col_time2:
-                        if days_since_publish > 0:
-                            views_per_day = int(selected_video.view_count / days_since_publish)
+                        if selected_video['views_per_day'] is not None:
+                            views_per_day = int(selected_video['views_per_day'])
                             st.metric(
                                 label="👁️ Views/day",
                                 value=f"{views_per_day:,}",
@@ -476,8 +548,8 @@ if selected_channel_id:
                             st.metric("👁️ Views/day", "N/A")
                     
                     with col_time3:
-                        if days_since_publish > 0:
-                            interactions_per_day = (selected_video.like_count + selected_video.comment_count) / days_since_publish
+                        if selected_video['interactions_per_day'] is not None:
+                            interactions_per_day = selected_video['interactions_per_day']
                             st.metric(
                                 label="⚡ Interactions/day",
                                 value=f"{interactions_per_day:.1f}",
@@ -491,14 +563,14 @@ if selected_channel_id:
             # Personal analysis section
             st.subheader("📊 Personal Analysis")
             
-            has_analysis = hasattr(selected_video, 'analysis') and selected_video.analysis
+            has_analysis = bool(selected_video.get("analysis"))
             
             # Initialize editor states
-            if f"edit_mode_{selected_video.id}" not in st.session_state:
-                st.session_state[f"edit_mode_{selected_video.id}"] = not has_analysis
+            if f"edit_mode_{selected_video['id']}" not in st.session_state:
+                st.session_state[f"edit_mode_{selected_video['id']}"] = not has_analysis
             
             # Template for analysis
-            template = f"""# Video Analysis: {selected_video.title}
+            template = f"""# Video Analysis: {selected_video['title']}
 
 ## Strengths
 - 
@@ -526,56 +598,54 @@ if selected_channel_id:
                 col_toggle, col_spacer, col_delete = st.columns([2, 8, 2])
                 
                 with col_toggle:
-                    edit_mode = st.session_state[f"edit_mode_{selected_video.id}"]
+                    edit_mode = st.session_state[f"edit_mode_{selected_video['id']}"]
                     if has_analysis and not edit_mode:
-                        if st.button("📝 Edit", key=f"toggle_edit_{selected_video.id}", use_container_width=True):
-                            st.session_state[f"edit_mode_{selected_video.id}"] = True
+                        if st.button("📝 Edit", key=f"toggle_edit_{selected_video['id']}", use_container_width=True):
+                            st.session_state[f"edit_mode_{selected_video['id']}"] = True
                             st.rerun()
                 
                 with col_delete:
                     if has_analysis:
-                        if st.button("🗑️ Delete", key=f"delete_analysis_{selected_video.id}", use_container_width=True):
-                            st.session_state[f"confirm_delete_analysis_{selected_video.id}"] = True
+                        if st.button("🗑️ Delete", key=f"delete_analysis_{selected_video['id']}", use_container_width=True):
+                            st.session_state[f"confirm_delete_analysis_{selected_video['id']}"] = True
                             st.rerun()
                 
                 # Analysis deletion confirmation
-                if st.session_state.get(f"confirm_delete_analysis_{selected_video.id}", False):
+                if st.session_state.get(f"confirm_delete_analysis_{selected_video['id']}", False):
                     st.warning("⚠️ Are you sure you want to delete the analysis for this video?")
                     col_conf1, col_conf2 = st.columns(2)
                     with col_conf1:
-                        if st.button("✅ Confirm", key=f"confirm_del_analysis_{selected_video.id}"):
-                            with Session() as sess:
-                                sess.query(Video).filter(Video.id == selected_video.id).update({"analysis": None})
-                                sess.commit()
+                        if st.button("✅ Confirm", key=f"confirm_del_analysis_{selected_video['id']}"):
+                            set_video_analysis(selected_video['id'], None)
+                            refresh_data()
                             st.success("Analysis deleted!")
-                            st.session_state.pop(f"confirm_delete_analysis_{selected_video.id}")
-                            st.session_state[f"edit_mode_{selected_video.id}"] = True
+                            st.session_state.pop(f"confirm_delete_analysis_{selected_video['id']}")
+                            st.session_state[f"edit_mode_{selected_video['id']}"] = True
                             st.rerun()
                     with col_conf2:
-                        if st.button("❌ Cancel", key=f"cancel_del_analysis_{selected_video.id}"):
-                            st.session_state.pop(f"confirm_delete_analysis_{selected_video.id}")
+                        if st.button("❌ Cancel", key=f"cancel_del_analysis_{selected_video['id']}"):
+                            st.session_state.pop(f"confirm_delete_analysis_{selected_video['id']}")
                             st.rerun()
                 
                 # Analysis content (edit or display)
                 if has_analysis:
-                    if st.session_state[f"edit_mode_{selected_video.id}"]:
+                    if st.session_state[f"edit_mode_{selected_video['id']}"]:
                         # Edit mode
                         analysis_text = st.text_area(
                             "Your analysis:",
-                            value=selected_video.analysis,
+                            value=selected_video['analysis'],
                             height=400,
-                            key=f"analysis_text_{selected_video.id}",
+                            key=f"analysis_text_{selected_video['id']}",
                             label_visibility="collapsed"
                         )
                         
                         col_save, col_cancel = st.columns([2, 10])
                         with col_save:
-                            if st.button("💾 Save", key=f"save_analysis_{selected_video.id}", use_container_width=True):
-                                with Session() as sess:
-                                    sess.query(Video).filter(Video.id == selected_video.id).update({"analysis": analysis_text})
-                                    sess.commit()
+                            if st.button("💾 Save", key=f"save_analysis_{selected_video['id']}", use_container_width=True):
+                                set_video_analysis(selected_video['id'], analysis_text)
+                                refresh_data()
                                 st.success("Analysis saved successfully!")
-                                st.session_state[f"edit_mode_{selected_video.id}"] = False
+                                st.session_state[f"edit_mode_{selected_video['id']}"] = False
                                 st.rerun()
                     else:
                         # Display mode - use a styled container
@@ -598,7 +668,7 @@ if selected_channel_id:
                             st.markdown('<div class="analysis-container">', unsafe_allow_html=True)
                             
                             # Render markdown directly to preserve formatting
-                            st.markdown(selected_video.analysis)
+                            st.markdown(selected_video['analysis'])
                             
                             # Close the div
                             st.markdown('</div>', unsafe_allow_html=True)
@@ -608,18 +678,17 @@ if selected_channel_id:
                         "Your analysis:",
                         value=template,
                         height=400,
-                        key=f"analysis_text_new_{selected_video.id}",
+                        key=f"analysis_text_new_{selected_video['id']}",
                         label_visibility="collapsed"
                     )
                     
                     col_save, col_spacer = st.columns([2, 10])
                     with col_save:
-                        if st.button("💾 Save", key=f"save_new_analysis_{selected_video.id}", use_container_width=True):
-                            with Session() as sess:
-                                sess.query(Video).filter(Video.id == selected_video.id).update({"analysis": analysis_text})
-                                sess.commit()
+                        if st.button("💾 Save", key=f"save_new_analysis_{selected_video['id']}", use_container_width=True):
+                            set_video_analysis(selected_video['id'], analysis_text)
+                            refresh_data()
                             st.success("Analysis saved successfully!")
-                            st.session_state[f"edit_mode_{selected_video.id}"] = False
+                            st.session_state[f"edit_mode_{selected_video['id']}"] = False
                             st.rerun()
             
             # Action buttons
@@ -628,22 +697,24 @@ if selected_channel_id:
             
             with col1:
                 if show_hidden:
-                    if st.button("✅ Restore", key=f"restore_{selected_video.id}", use_container_width=True):
-                        with Session() as sess:
-                            sess.query(Video).filter(Video.id == selected_video.id).update({"hidden": False})
-                            sess.commit()
+                    if st.button("✅ Restore", key=f"restore_{selected_video['id']}", use_container_width=True):
+                        set_video_hidden(selected_video['id'], False)
+                        update_channel_tiers([ch["id"]], config.GOLD_THRESHOLD, config.BRONZE_THRESHOLD,
+                                             by_age_cohort=config.TIER_BY_AGE_COHORT)
+                        refresh_data()
                         st.success("Video restored!")
                         st.rerun()
                 else:
-                    if st.button("🙈 Hide", key=f"hide_{selected_video.id}", use_container_width=True):
-                        with Session() as sess:
-                            sess.query(Video).filter(Video.id == selected_video.id).update({"hidden": True})
-                            sess.commit()
+                    if st.button("🙈 Hide", key=f"hide_{selected_video['id']}", use_container_width=True):
+                        set_video_hidden(selected_video['id'], True)
+                        update_channel_tiers([ch["id"]], config.GOLD_THRESHOLD, config.BRONZE_THRESHOLD,
+                                             by_age_cohort=config.TIER_BY_AGE_COHORT)
+                        refresh_data()
                         st.success("Video hidden!")
                         st.rerun()
             
             with col2:
-                video_url = f"https://www.youtube.com/watch?v={selected_video.id}"
+                video_url = f"https://www.youtube.com/watch?v={selected_video['id']}"
                 st.link_button("🎥 Open", video_url, use_container_width=True)
     
     else:
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("YOUTUBE_API_KEY", "test")  # config.py requires one; tests make no API call
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A fresh SQLite database for the test, bound to the storage module"""
+    from app.data import storage
+    storage.configure_database(str(tmp_path / "test.db"))
+    storage.init_db()
+    yield storage
+    storage.engine.dispose()
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from app.services.channel_id_cache import ChannelIdCache
+
+
+def test_resolutions_are_buffered_until_flush(database):
+    cache = ChannelIdCache()
+    cache.put("@handle", "UCx")
+
+    assert cache.get("@handle", timedelta(days=1)) == "UCx"
+    assert database.get_cached_channel_id("@handle", timedelta(days=1)) is None
+
+    cache.flush()
+    assert database.get_cached_channel_id("@handle", timedelta(days=1)) == "UCx"
+
+    cache.invalidate("@handle")
+    assert cache.get("@handle", timedelta(days=1)) is None
+    cache.flush()
+    assert database.get_cached_channel_id("@handle", timedelta(days=1)) is None
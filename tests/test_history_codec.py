@@ -0,0 +1,43 @@
+import struct
+import zlib
+
+import numpy as np
+
+from app.data.history_codec import MAX_APPENDED, decode_history, encode_history
+from app.data.storage import add_history_point
+
+
+def expected_arrays(points):
+    dates = sorted(points)
+    return np.array(dates, dtype="datetime64[D]"), np.array([points[day] for day in dates], dtype=np.int64)
+
+
+def test_add_history_point_appends_past_the_re_encode_threshold_and_inserts_older_dates():
+    start = np.datetime64("2024-01-01")
+    points = {str(start + i): 1000 + 7 * i for i in range(30)}
+    blob = encode_history(list(points), list(points.values()))
+
+    for i in range(30, 30 + 2 * MAX_APPENDED + 5):
+        points[str(start + i)] = 1000 + 7 * i
+        blob = add_history_point(blob, points[str(start + i)], str(start + i))
+    blob = add_history_point(blob, 1, "2024-01-10")
+    blob = add_history_point(blob, 2, "2023-12-25")
+    points.update({"2024-01-10": 1, "2023-12-25": 2})
+
+    dates, counts = decode_history(blob)
+    expected_dates, expected_counts = expected_arrays(points)
+    assert np.array_equal(dates, expected_dates)
+    assert np.array_equal(counts, expected_counts)
+
+
+def test_legacy_blobs_still_decode_and_accept_new_points():
+    days = np.datetime64("2024-01-01") + np.arange(5)
+    counts = np.arange(5, dtype=np.int64) * 10
+    as_ints = days.astype(np.int64)
+    body = np.diff(as_ints).astype("<i4").tobytes() + np.diff(counts).astype("<i8").tobytes()
+    legacy = struct.pack("<3sIiq", b"YH1", len(days), int(as_ints[0]), 0) + zlib.compress(body)
+
+    dates, decoded = decode_history(add_history_point(legacy, 50, "2024-01-06"))
+
+    assert np.array_equal(dates, np.append(days, np.datetime64("2024-01-06")))
+    assert decoded.tolist() == [0, 10, 20, 30, 40, 50]
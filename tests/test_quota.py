@@ -0,0 +1,15 @@
+from app.services import quota
+from app.services.quota import QuotaScheduler
+
+
+def test_mark_exhausted_only_persists_on_flush(database, monkeypatch):
+    saved = []
+    monkeypatch.setattr(quota, "save_quota_usage", lambda day, used: saved.append((day, used)))
+    scheduler = QuotaScheduler(daily_budget=100)
+
+    scheduler.mark_exhausted()
+    assert saved == []
+    assert scheduler.remaining == 0
+
+    scheduler.flush()
+    assert saved == [(scheduler._day, 100)]
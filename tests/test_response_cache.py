@@ -0,0 +1,83 @@
+import zlib
+from datetime import datetime, timedelta
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from app.services.response_cache import ResponseCache, cache_entries, cache_key, is_not_modified
+
+
+class Request:
+    def __init__(self, uri):
+        self.uri = uri
+        self.headers = {}
+
+
+def not_modified(request):
+    raise HttpError(httplib2.Response({"status": 304}), b"", uri=request.uri)
+
+
+def channel_response(etag="e1"):
+    return {"etag": etag, "items": [{
+        "id": "UCx", "snippet": {"title": "Channel", "description": "x" * 1000},
+        "statistics": {"subscriberCount": "10", "viewCount": "100", "videoCount": "1"},
+    }]}
+
+
+def test_entries_are_only_stored_with_the_rows_they_cover(database):
+    cache = ResponseCache()
+    uri = "https://youtube.googleapis.com/youtube/v3/channels?id=UCx&part=snippet%2Cstatistics&key=secret"
+
+    item = cache.execute(Request(uri), lambda request: channel_response())["items"][0]
+    assert database.get_cached_response(cache_key(uri)) is None
+
+    database.save_channel_info(item, cache_entries([item]))
+    request = Request(uri)
+    cached = cache.execute(request, not_modified)
+    assert request.headers["If-None-Match"] == "e1"
+    assert is_not_modified(cached)
+    # The snippet is not kept, the statistics are (for today's snapshot)
+    assert cached["items"][0]["id"] == "UCx"
+    assert "snippet" not in cached["items"][0]
+    assert cached["items"][0]["statistics"]["subscriberCount"] == "10"
+    assert list(cache_entries(cached["items"])) == [cache_key(uri)]
+
+
+def test_entries_without_statistics_are_not_sent_as_conditional(database):
+    uri = "https://youtube.googleapis.com/youtube/v3/channels?id=UCx&part=statistics"
+    sess = database.Session()
+    try:
+        sess.add(database.ApiResponseCache(request_key=cache_key(uri), etag="e1",
+                                           payload=zlib.compress(b'{"items": [{"id": "UCx"}]}')))
+        sess.commit()
+    finally:
+        sess.close()
+
+    request = Request(uri)
+    ResponseCache().execute(request, lambda request: channel_response("e2"))
+    assert "If-None-Match" not in request.headers
+
+
+def test_prune_drops_entries_unused_for_the_ttl(database):
+    cache = ResponseCache()
+    old_uri = "https://youtube.googleapis.com/youtube/v3/channels?id=UCx&part=snippet"
+    served_uri = "https://youtube.googleapis.com/youtube/v3/channels?id=UCx&part=statistics"
+    for uri in (old_uri, served_uri):
+        item = cache.execute(Request(uri), lambda request: channel_response())["items"][0]
+        database.save_channel_info(item, cache_entries([item]))
+    sess = database.Session()
+    try:
+        sess.query(database.ApiResponseCache).update(
+            {database.ApiResponseCache.fetched_at: datetime.utcnow() - timedelta(days=30)}
+        )
+        sess.commit()
+    finally:
+        sess.close()
+
+    # Served after a 304 and saved again: counts as used
+    item = cache.execute(Request(served_uri), not_modified)["items"][0]
+    database.save_channel_info(item, cache_entries([item]))
+
+    assert cache.prune(timedelta(days=7)) == 1
+    assert database.get_cached_response(cache_key(old_uri)) is None
+    assert database.get_cached_response(cache_key(served_uri)) is not None
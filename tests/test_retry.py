@@ -0,0 +1,131 @@
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.services.quota import QuotaExceededError
+from app.services.retry import RetryPolicy
+
+
+def http_error(status, reason):
+    body = json.dumps({"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), body, uri="https://youtube.googleapis.com")
+
+
+class FlakyRequest:
+    """Raises the queued `faults` one per call, then returns `response`"""
+
+    def __init__(self, faults, response=None, method="videos.list"):
+        self.methodId = f"youtube.{method}"
+        self.faults = list(faults)
+        self.response = response if response is not None else {"items": []}
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.faults:
+            raise self.faults.pop(0)
+        return self.response
+
+
+class FakeClock:
+    """Clock that only moves when the policy sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def make_policy(clock, **kwargs):
+    kwargs.setdefault("max_attempts", 5)
+    kwargs.setdefault("base_delay", 1.0)
+    kwargs.setdefault("max_delay", 8.0)
+    kwargs.setdefault("deadline", 1000.0)
+    return RetryPolicy(sleep=clock.sleep, clock=clock, rng=lambda: 1.0, **kwargs)
+
+
+def send(request):
+    return request.execute()
+
+
+@pytest.mark.parametrize("fault", [http_error(503, "backendError"), ConnectionResetError("reset")])
+def test_transient_error_is_retried_until_success(fault):
+    clock = FakeClock()
+    policy = make_policy(clock)
+    request = FlakyRequest([fault, fault], response={"items": [{"id": "video1"}]})
+
+    assert policy.execute(send, request) == {"items": [{"id": "video1"}]}
+    assert request.calls == 3
+    assert clock.sleeps == [1.0, 2.0]
+    assert policy.retries == {"videos.list": 2}
+    assert not policy.failures
+
+
+def test_backoff_is_capped_and_attempts_are_bounded():
+    clock = FakeClock()
+    policy = make_policy(clock, max_attempts=6, max_delay=5.0)
+    request = FlakyRequest([http_error(503, "backendError")] * 10)
+
+    with pytest.raises(HttpError):
+        policy.execute(send, request)
+    assert request.calls == 6
+    assert clock.sleeps == [1.0, 2.0, 4.0, 5.0, 5.0]
+    assert policy.retries == {"videos.list": 5}
+    assert policy.failures == {"videos.list": 1}
+
+
+def test_backoff_is_jittered_by_rng():
+    policy = RetryPolicy(base_delay=2.0, max_delay=60.0, rng=lambda: 0.25)
+    assert [policy.backoff(attempt) for attempt in (1, 2, 3)] == [0.5, 1.0, 2.0]
+
+
+def test_gives_up_when_the_next_wait_would_pass_the_deadline():
+    clock = FakeClock()
+    policy = make_policy(clock, max_attempts=10, deadline=5.0)
+    request = FlakyRequest([ConnectionResetError("reset")] * 10)
+
+    with pytest.raises(ConnectionResetError):
+        policy.execute(send, request)
+    # Waits of 1 and 2 fit in the 5 s deadline; the next one (4 s, at t=3) would not
+    assert clock.sleeps == [1.0, 2.0]
+    assert request.calls == 3
+    assert policy.failures == {"videos.list": 1}
+
+
+@pytest.mark.parametrize("fault", [
+    http_error(403, "quotaExceeded"),
+    QuotaExceededError("YouTube API quota exceeded on videos.list"),
+    http_error(404, "videoNotFound"),
+    http_error(400, "badRequest"),
+])
+def test_permanent_errors_are_not_retried(fault):
+    clock = FakeClock()
+    policy = make_policy(clock)
+    request = FlakyRequest([fault])
+
+    with pytest.raises(type(fault)):
+        policy.execute(send, request)
+    assert request.calls == 1
+    assert not clock.sleeps
+    assert not policy.retries
+    assert not policy.failures
+
+
+def test_counters_are_kept_per_endpoint():
+    clock = FakeClock()
+    policy = make_policy(clock, max_attempts=2)
+    policy.execute(send, FlakyRequest([http_error(429, "rateLimitExceeded")], method="channels.list"))
+    with pytest.raises(HttpError):
+        policy.execute(send, FlakyRequest([http_error(500, "internalError")] * 2, method="playlistItems.list"))
+
+    assert policy.retries == {"channels.list": 1, "playlistItems.list": 1}
+    assert policy.failures == {"playlistItems.list": 1}
+    assert policy.summary() == "2 retries (channels.list: 1, playlistItems.list: 1), 1 requests given up"
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import undefer_group
+
+
+def test_delete_channel_removes_video_metrics(database):
+    database.save_channel_info({
+        "id": "UCx", "snippet": {"title": "Channel", "description": ""},
+        "statistics": {"subscriberCount": "10", "viewCount": "100", "videoCount": "1"},
+    })
+    database.save_videos("UCx", [{
+        "id": "video1",
+        "snippet": {"title": "Video", "description": "", "publishedAt": "2024-01-01T00:00:00Z"},
+        "statistics": {"viewCount": "100", "likeCount": "5", "commentCount": "1"},
+    }])
+    database.update_channel_tiers(["UCx"], 0.9, 0.1)
+
+    database.delete_channel("UCx")
+
+    sess = database.Session()
+    try:
+        assert sess.query(database.Video).count() == 0
+        assert sess.query(database.VideoMetrics).count() == 0
+        assert sess.query(database.VideoStatsSnapshot).count() == 0
+    finally:
+        sess.close()
+
+
+def test_compact_legacy_history_rewrites_json_as_blobs(database):
+    history = [{"date": f"2024-01-{day:02d}", "count": 1000 + 10 * day} for day in range(1, 31)]
+    legacy = database.serialize_history_json(history)
+    sess = database.Session()
+    try:
+        sess.add(database.Channel(id="UCx", title="Channel"))
+        sess.add(database.Video(id="video1", channel_id="UCx", title="Video"))
+        sess.flush()
+        # Old databases hold JSON text in these columns
+        sess.execute(text("UPDATE channels SET subscriber_history = :h"), {"h": legacy})
+        sess.execute(text("UPDATE videos SET view_count_history = :h"), {"h": legacy})
+        sess.commit()
+    finally:
+        sess.close()
+
+    assert database.compact_legacy_history() == 2
+    assert database.compact_legacy_history() == 0
+
+    sess = database.Session()
+    try:
+        channel = sess.query(database.Channel).options(undefer_group("legacy_history")).get("UCx")
+        video = sess.query(database.Video).options(undefer_group("legacy_history")).get("video1")
+        assert database.is_encoded_history(channel.subscriber_history)
+        assert database.parse_history_json(channel.subscriber_history) == history
+        assert channel.view_count_history is None
+        assert database.parse_history_json(video.view_count_history) == history
+        assert video.like_count_history is None
+    finally:
+        sess.close()
+
+
+def test_unchanged_statistics_recompute_metrics_from_an_earlier_day(database):
+    video = {
+        "id": "video1",
+        "snippet": {"title": "Video", "description": "", "publishedAt": "2024-01-01T00:00:00Z"},
+        "statistics": {"viewCount": "1000", "likeCount": "5", "commentCount": "1"},
+    }
+    database.save_videos("UCx", [video])
+    assert database.save_videos("UCx", [video]) == 0
+
+    sess = database.Session()
+    try:
+        sess.query(database.VideoMetrics).update({database.VideoMetrics.computed_at: datetime(2024, 1, 11)})
+        sess.commit()
+    finally:
+        sess.close()
+
+    assert database.save_video_statistics([{"id": "video1", "statistics": video["statistics"]}]) == {"UCx"}
+    metrics = database.get_video_data("video1")
+    assert metrics["days_since_publish"] > 10
+    assert metrics["views_per_day"] < 100
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analytics import interpolate_at_dates
+
+
+def loop_interpolate(df_history, video_date):
+    """Per-marker loop that create_evolution_chart used before interpolate_at_dates"""
+    if len(df_history) > 1:
+        if video_date <= df_history['date'].min():
+            return df_history['count'].iloc[0]
+        if video_date >= df_history['date'].max():
+            return df_history['count'].iloc[-1]
+        idx = df_history[df_history['date'] <= video_date].index[-1]
+        if idx < len(df_history) - 1:
+            x1, y1 = df_history.loc[idx, 'date'], df_history.loc[idx, 'count']
+            x2, y2 = df_history.loc[idx + 1, 'date'], df_history.loc[idx + 1, 'count']
+            return y1 + (video_date - x1) / (x2 - x1) * (y2 - y1)
+        return df_history.loc[idx, 'count']
+    return df_history['count'].iloc[0] if len(df_history) > 0 else 0
+
+
+def test_clamps_before_and_after_the_history_range():
+    values = interpolate_at_dates(["2024-01-10", "2024-01-20"], [100, 200], ["2023-12-31", "2024-01-10", "2024-01-20", "2024-02-01"])
+    np.testing.assert_allclose(values, [100, 100, 200, 200])
+
+
+def test_interpolates_linearly_between_points():
+    values = interpolate_at_dates(["2024-01-10", "2024-01-20"], [100, 200], ["2024-01-15 00:00", "2024-01-12 12:00"])
+    np.testing.assert_allclose(values, [150, 125])
+
+
+def test_single_point_history_is_constant():
+    values = interpolate_at_dates(["2024-01-10"], [42], ["2024-01-01", "2024-01-10", "2024-03-01"])
+    np.testing.assert_allclose(values, [42, 42, 42])
+
+
+def test_empty_history_gives_zeros():
+    values = interpolate_at_dates([], [], ["2024-01-01", "2024-01-02"])
+    np.testing.assert_array_equal(values, [0, 0])
+
+
+def test_matches_the_previous_loop():
+    rng = np.random.default_rng(0)
+    dates = pd.Series(pd.date_range("2023-01-01", periods=60, freq="3D"))
+    counts = np.cumsum(rng.integers(0, 500, size=len(dates)))
+    df_history = pd.DataFrame({"date": dates, "count": counts})
+    video_dates = pd.Series(pd.to_datetime("2022-12-01") + pd.to_timedelta(rng.integers(0, 240 * 24, size=50), unit="h"))
+
+    expected = [loop_interpolate(df_history, video_date) for video_date in video_dates]
+    values = interpolate_at_dates(df_history['date'], df_history['count'], video_dates)
+    assert values == pytest.approx(expected)
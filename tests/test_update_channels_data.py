@@ -0,0 +1,154 @@
+import threading
+from datetime import date, datetime
+
+from googleapiclient.errors import HttpError
+
+import main
+from app.services.quota import QuotaExceededError, QuotaScheduler
+from app.services.retry import RetryPolicy
+from app.services.youtube_api import YouTubeAPIService
+from benchmarks.fake_api import FakeYouTubeService, http_error
+from config import config
+
+
+def test_concurrent_quota_exhaustion_finishes_and_records_every_started_channel(database, monkeypatch):
+    channels = [f"UC{i:022d}" for i in range(8)]
+    workers = 3
+    started = []
+    cancelled = threading.Event()
+    cancel_pending = main.cancel_pending
+
+    def cancel_and_notify(futures):
+        skipped = cancel_pending(futures)
+        cancelled.set()
+        return skipped
+
+    def fetch_channel_data(identifier, emit, incremental=True, full_refresh=False):
+        started.append(identifier)
+        # The first worker runs out of quota; the others are still running when the writer
+        # cancels the queued channels, and run out of quota right after
+        if len(started) > 1:
+            cancelled.wait(timeout=5)
+        raise QuotaExceededError("YouTube API quota exceeded on channels.list")
+
+    scheduler = QuotaScheduler(daily_budget=10 ** 6)
+    monkeypatch.setattr(main, "fetch_channel_data", fetch_channel_data)
+    monkeypatch.setattr(main, "cancel_pending", cancel_and_notify)
+    monkeypatch.setattr(main, "read_channels_from_file", lambda file_path="channels.txt": list(channels))
+    monkeypatch.setattr(main, "get_default_scheduler", lambda: scheduler)
+    monkeypatch.setattr(config, "EXPORT_AFTER_UPDATE", False)
+
+    run = threading.Thread(target=main.update_channels_data, kwargs={"max_workers": workers}, daemon=True)
+    run.start()
+    run.join(timeout=10)
+    assert not run.is_alive(), "update_channels_data did not return"
+
+    statuses = {row["identifier"]: row["status"] for row in database.get_update_run_channels()}
+    assert workers <= len(started) < len(channels)
+    assert {identifier for identifier, status in statuses.items() if status == database.CHANNEL_FAILED} == set(started)
+    assert all(statuses[identifier] == database.CHANNEL_PENDING for identifier in channels if identifier not in started)
+
+
+class CountingFakeService(FakeYouTubeService):
+    """FakeYouTubeService that counts its 304 answers"""
+
+    not_modified = 0
+
+    def handle(self, method, params, headers):
+        try:
+            return super().handle(method, params, headers)
+        except HttpError as e:
+            if e.resp.status == 304:
+                self.not_modified += 1
+            raise
+
+
+def run_update(monkeypatch, service):
+    api = YouTubeAPIService(scheduler=QuotaScheduler(daily_budget=10 ** 6),
+                            retry_policy=RetryPolicy(sleep=lambda delay: None), service=service)
+    monkeypatch.setattr(main, "get_worker_service", lambda: api)
+    monkeypatch.setattr(main, "read_channels_from_file", lambda file_path="channels.txt": list(service.channel_ids))
+    monkeypatch.setattr(config, "EXPORT_AFTER_UPDATE", False)
+    monkeypatch.setattr(config, "ETAG_CACHE_ENABLED", True)
+    main.update_channels_data(max_workers=1, write_batch_size=50)
+
+
+def test_etags_are_only_kept_for_committed_pages_and_304s_still_refresh(database, monkeypatch):
+    service = CountingFakeService(channels=1, videos_per_channel=120)
+    save_videos = main.save_videos
+    calls = []
+
+    def fail_first_save(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        return save_videos(*args, **kwargs)
+
+    monkeypatch.setattr(main, "save_videos", fail_first_save)
+    run_update(monkeypatch, service)
+    monkeypatch.setattr(main, "save_videos", save_videos)
+    run_update(monkeypatch, service)
+
+    sess = database.Session()
+    try:
+        assert sess.query(database.Video).count() == 120
+    finally:
+        sess.close()
+
+    # Nothing changed upstream: the next updates are answered with 304s, which still
+    # refresh fetched_at and today's snapshots
+    run_update(monkeypatch, service)
+    sess = database.Session()
+    try:
+        sess.query(database.Channel).update({database.Channel.fetched_at: datetime(2020, 1, 1)})
+        sess.query(database.Video).update({database.Video.fetched_at: datetime(2020, 1, 1)})
+        sess.query(database.ChannelStatsSnapshot).delete()
+        sess.query(database.VideoStatsSnapshot).delete()
+        sess.commit()
+    finally:
+        sess.close()
+    service.not_modified = 0
+    run_update(monkeypatch, service)
+
+    assert service.not_modified == 1 + 3  # channels.list, then the known videos in batches of 50
+    sess = database.Session()
+    try:
+        assert sess.query(database.Channel).filter(database.Channel.fetched_at > datetime(2020, 1, 1)).count() == 1
+        assert sess.query(database.Video).filter(database.Video.fetched_at > datetime(2020, 1, 1)).count() == 120
+        assert sess.query(database.ChannelStatsSnapshot).filter_by(date=date.today()).count() == 1
+        assert sess.query(database.VideoStatsSnapshot).filter_by(date=date.today()).count() == 120
+    finally:
+        sess.close()
+
+
+class FaultOnCall(FakeYouTubeService):
+    """FakeYouTubeService whose `number`-th call of `method` raises `error`"""
+
+    def __init__(self, method, number, error, **kwargs):
+        super().__init__(**kwargs)
+        self.fault_on = (method, number, error)
+
+    def handle(self, method, params, headers):
+        fault_method, number, error = self.fault_on
+        if method == fault_method and self.call_counts().get(method, 0) == number - 1:
+            self.faults[method] = [1, error]
+        return super().handle(method, params, headers)
+
+
+def test_incremental_run_after_a_partial_walk_fetches_the_older_pages(database, monkeypatch):
+    service = FaultOnCall("videos.list", 4, http_error(400, "badRequest"), channels=1, videos_per_channel=300)
+    channel_id = service.channel_ids[0]
+
+    run_update(monkeypatch, service)
+    assert len(database.get_known_video_ids(channel_id)) == 150
+    assert not database.is_uploads_walk_complete(channel_id)
+
+    # A normal daily run, not --resume
+    run_update(monkeypatch, service)
+    assert len(database.get_known_video_ids(channel_id)) == 300
+    assert database.is_uploads_walk_complete(channel_id)
+
+    # The next incremental run stops at the first known video again
+    playlist_calls = service.call_counts()["playlistItems.list"]
+    run_update(monkeypatch, service)
+    assert service.call_counts()["playlistItems.list"] == playlist_calls + 1
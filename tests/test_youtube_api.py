@@ -0,0 +1,75 @@
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.services.quota import QuotaScheduler
+from app.services.retry import RetryPolicy
+from app.services.youtube_api import YouTubeAPIService
+from benchmarks.fake_api import FakeYouTubeService, video_id_for
+
+
+def http_error(status, reason):
+    body = json.dumps({"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), body, uri="https://youtube.googleapis.com")
+
+
+class Request:
+    methodId = "youtube.channels.list"
+    uri = "https://youtube.googleapis.com/youtube/v3/channels"
+
+    def __init__(self, error):
+        self.error = error
+        self.headers = {}
+
+    def execute(self):
+        raise self.error
+
+
+class Service:
+    """channels().list(...) requests that always fail with `error`"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def channels(self):
+        return self
+
+    def list(self, **params):
+        return Request(self.error)
+
+
+def make_api(service, monkeypatch):
+    monkeypatch.setattr("config.config.ETAG_CACHE_ENABLED", False)
+    return YouTubeAPIService(
+        scheduler=QuotaScheduler(daily_budget=10 ** 6),
+        retry_policy=RetryPolicy(max_attempts=3, sleep=lambda delay: None),
+        service=service,
+    )
+
+
+@pytest.mark.parametrize("error", [http_error(503, "backendError"), ConnectionResetError("reset")])
+def test_get_channel_info_raises_once_retries_are_exhausted(database, monkeypatch, error):
+    api = make_api(Service(error), monkeypatch)
+    with pytest.raises(type(error)):
+        api.get_channel_info("UC0000000000000000000000")
+
+
+def test_get_channel_info_returns_none_for_a_missing_channel(database, monkeypatch):
+    api = make_api(Service(http_error(404, "channelNotFound")), monkeypatch)
+    assert api.get_channel_info("UC0000000000000000000000") is None
+
+
+def test_video_statistics_survive_transient_faults(database, monkeypatch):
+    service = FakeYouTubeService(channels=1, videos_per_channel=120,
+                                 faults={"videos.list": [2, ConnectionResetError("reset")]})
+    api = make_api(service, monkeypatch)
+    video_ids = [video_id_for(0, i) for i in range(120)]
+
+    items = api.get_video_statistics(video_ids)
+
+    assert [item["id"] for item in items] == video_ids
+    assert service.call_counts()["videos.list"] == 3 + 2
+    assert api.retry_policy.retries == {"videos.list": 2}
+    assert not api.retry_policy.failures